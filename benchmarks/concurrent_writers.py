@@ -0,0 +1,88 @@
+"""Throughput of DataHandler.update_date_record under N concurrent writer processes.
+
+Each writer process saves its own range of dates; at the end the file must
+contain every date exactly once (no lost updates).
+
+    uv run python benchmarks/concurrent_writers.py --writers 1 2 4 8 --updates 50
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_handler import create_data_handler
+
+START_DATE = date(2020, 1, 1)
+
+
+def _writer(backend, data_path, backup_dir, writer_id, updates, append_only, barrier):
+    if backend == 'sqlite':
+        handler = create_data_handler(backend, db_file=data_path)
+    else:
+        handler = create_data_handler(backend, data_file=data_path, backup_dir=backup_dir,
+                                      append_only=append_only)
+    try:
+        barrier.wait()
+        for i in range(updates):
+            day = START_DATE + timedelta(days=writer_id * updates + i)
+            handler.update_date_record(day.isoformat(), [f"1.{i + 1}"], [], f"writer {writer_id}")
+    finally:
+        handler.close()
+
+
+def run(backend, writers, updates, append_only):
+    """Return (seconds, records_found) for one benchmark configuration."""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'progress.db' if backend == 'sqlite' else 'progress.jsonl')
+        backup_dir = os.path.join(tmp, 'backups')
+
+        barrier = multiprocessing.Barrier(writers + 1)
+        processes = [
+            multiprocessing.Process(
+                target=_writer,
+                args=(backend, data_path, backup_dir, w, updates, append_only, barrier)
+            )
+            for w in range(writers)
+        ]
+        for p in processes:
+            p.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for p in processes:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        if backend == 'sqlite':
+            handler = create_data_handler(backend, db_file=data_path)
+        else:
+            handler = create_data_handler(backend, data_file=data_path, backup_dir=backup_dir)
+        try:
+            return elapsed, len(handler.load_all_data())
+        finally:
+            handler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--updates', type=int, default=50, help='Updates per writer')
+    parser.add_argument('--backend', choices=['jsonl', 'sqlite'], default='jsonl')
+    parser.add_argument('--append-only', action='store_true')
+    args = parser.parse_args()
+
+    print(f"backend={args.backend} append_only={args.append_only} updates/writer={args.updates}")
+    print(f"{'writers':>8} {'seconds':>9} {'updates/s':>10} {'lost':>5}")
+    for writers in args.writers:
+        elapsed, found = run(args.backend, writers, args.updates, args.append_only)
+        expected = writers * args.updates
+        print(f"{writers:>8} {elapsed:>9.3f} {expected / elapsed:>10.1f} {expected - found:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Save latency at each durability level (see utils/durability.py).
+
+A synthetic history is written to a scratch directory, then --saves new days
+are saved one by one (backups included) and each save timed. With 'group'
+the fsyncs happen after the save returns; the time of the last, explicit
+group commit is reported separately.
+
+The scratch directory is created under the repository by default, as /tmp
+is often a tmpfs where fsync costs nothing; point --dir at the disk the data
+lives on.
+
+    uv run python benchmarks/durability.py
+    uv run python benchmarks/durability.py --years 5 --saves 200 --append-only
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add parent directory to path to import utils
+sys.path.append(ROOT)
+
+from benchmarks.synthetic import generate_history, write_jsonl  # noqa: E402
+from utils.data_handler import create_data_handler  # noqa: E402
+from utils.durability import DURABILITY_LEVELS  # noqa: E402
+
+
+def bench_level(level: str, backend: str, records: List[Dict], saves: int,
+                append_only: bool, directory: str) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        backup_dir = os.path.join(tmp, 'backups')
+        if backend == 'sqlite':
+            handler = create_data_handler(backend, db_file=os.path.join(tmp, 'progress.db'),
+                                          backup_dir=backup_dir, durability=level)
+            handler.import_records(records)
+        else:
+            write_jsonl(records, os.path.join(tmp, 'progress.jsonl'))
+            handler = create_data_handler(backend, data_file=os.path.join(tmp, 'progress.jsonl'),
+                                          backup_dir=backup_dir, append_only=append_only,
+                                          durability=level)
+        try:
+            handler.load_all_data()
+
+            last = records[-1]
+            day = date.fromisoformat(last['date'])
+            samples = []
+            for _ in range(saves):
+                day += timedelta(days=1)
+                record = dict(last, date=day.isoformat())
+                start = time.perf_counter()
+                handler.update_date_records([record])
+                samples.append((time.perf_counter() - start) * 1000)
+
+            commit_ms = 0.0
+            if handler.backups is not None and handler.backups.committer is not None:
+                start = time.perf_counter()
+                handler.backups.committer.commit()
+                commit_ms = (time.perf_counter() - start) * 1000
+        finally:
+            handler.close()
+
+    samples.sort()
+    return {
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'mean_ms': statistics.fmean(samples),
+        'commit_ms': commit_ms
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure save latency at each durability level')
+    parser.add_argument('--years', type=float, default=1, help='size of the synthetic history')
+    parser.add_argument('--saves', type=int, default=100, help='saves timed per level')
+    parser.add_argument('--backend', choices=['jsonl', 'sqlite'], default='jsonl')
+    parser.add_argument('--append-only', action='store_true', help='JSONL append-only storage')
+    parser.add_argument('--dir', default=ROOT, help='where the scratch directory is created')
+    parser.add_argument('levels', nargs='*', default=list(DURABILITY_LEVELS))
+    args = parser.parse_args()
+
+    records = generate_history(args.years)
+    mode = ' append-only' if args.append_only else ''
+    print(f"{args.backend}{mode}, {len(records)} records, {args.saves} saves per level")
+    print(f"{'level':<8} {'median ms':>10} {'p95 ms':>8} {'mean ms':>8} {'commit ms':>10}")
+    for level in args.levels:
+        result = bench_level(level, args.backend, records, args.saves, args.append_only, args.dir)
+        print(f"{level:<8} {result['median_ms']:>10.2f} {result['p95_ms']:>8.2f} "
+              f"{result['mean_ms']:>8.2f} {result['commit_ms']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Cold-start cost of each page: modules imported by its first render, and render time.
+
+Every page is rendered once with streamlit's AppTest in a fresh interpreter
+started with `-X importtime`; only imports triggered by the page itself are
+counted (streamlit and AppTest are imported before the measurement starts).
+
+    uv run python benchmarks/import_time.py
+    uv run python benchmarks/import_time.py --top 15 pages/2_overview.py
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ['pages/1_input_progress.py', 'pages/2_overview.py', 'pages/3_details.py']
+MARKER = '--- render ---'
+
+_RENDER = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+sys.path.insert(0, {root!r})
+print({marker!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+at = AppTest.from_file({page!r}, default_timeout=300).run()
+print('RENDER', time.perf_counter() - start, len(at.exception))
+"""
+
+
+def measure(page: str):
+    """Return (render seconds, exceptions, [(cumulative us, module)] of top-level imports)."""
+    code = _RENDER.format(root=ROOT, marker=MARKER, page=os.path.join(ROOT, page))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, capture_output=True, text=True)
+    render = [line.split() for line in result.stdout.splitlines() if line.startswith('RENDER')]
+    if not render:
+        raise RuntimeError(f"Rendering {page} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    started = False
+    for line in result.stderr.splitlines():
+        if line.startswith(MARKER):
+            started = True
+        elif started and line.startswith('import time:'):
+            _, cumulative, name = line[len('import time:'):].split('|')
+            # Top-level imports only; nested ones are included in their parent
+            if cumulative.strip().isdigit() and not name.startswith('  '):
+                imports.append((int(cumulative), name.strip()))
+    return float(render[0][1]), int(render[0][2]), imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold-start imports and first render of each page')
+    parser.add_argument('pages', nargs='*', default=PAGES)
+    parser.add_argument('--top', type=int, default=8, help='heaviest imports to list per page')
+    args = parser.parse_args()
+
+    for page in args.pages:
+        seconds, exceptions, imports = measure(page)
+        total_ms = sum(cumulative for cumulative, _ in imports) / 1000
+        status = '' if not exceptions else f'  ({exceptions} exception(s))'
+        print(f"{page}: first render {seconds * 1000:.0f} ms, imports {total_ms:.0f} ms{status}")
+        for cumulative, name in sorted(imports, reverse=True)[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""Timings of the data handler, continuity validation and charts on synthetic histories.
+
+For each history size (see synthetic.py) every operation is run --repeat
+times and its median and fastest time recorded. Results are written to
+benchmarks/results/<timestamp>.json and compared with the previous run of the
+same backend; operations slower than --threshold are reported as regressions
+(exit status 1).
+
+    uv run python benchmarks/run_benchmarks.py
+    uv run python benchmarks/run_benchmarks.py --years 1 5 --backend sqlite --repeat 3
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Add parent directory to path to import utils
+sys.path.append(ROOT)
+
+from benchmarks.synthetic import generate_history, write_jsonl  # noqa: E402
+from utils import charts  # noqa: E402
+from utils.data_handler import create_data_handler  # noqa: E402
+from utils.validation import validate_continuity  # noqa: E402
+
+
+def _time(func: Callable[[], Any], repeat: int, setup: Callable[[], Any] = None) -> Dict[str, float]:
+    """Median and minimum milliseconds of `repeat` calls; setup() runs untimed before each."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': statistics.median(samples), 'min_ms': min(samples)}
+
+
+def _validate_history(records: List[Dict[str, Any]]) -> int:
+    """Run validate_continuity over every day against the day before; returns the break count."""
+    breaks = 0
+    previous = {'problems': [], 'exercises': []}
+    for record in records:
+        valid, _ = validate_continuity(record['problems'], record['exercises'],
+                                       previous['problems'], previous['exercises'])
+        breaks += not valid
+        previous = record
+    return breaks
+
+
+def bench_history(backend: str, years: float, repeat: int) -> Dict[str, Dict[str, float]]:
+    records = generate_history(years)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def open_handler():
+            if backend == 'sqlite':
+                return create_data_handler(backend, db_file=os.path.join(tmp, 'progress.db'))
+            return create_data_handler(backend, data_file=os.path.join(tmp, 'progress.jsonl'),
+                                       backup_dir=os.path.join(tmp, 'backups'))
+
+        if backend == 'sqlite':
+            handler = open_handler()
+            try:
+                handler.import_records(records)
+            finally:
+                handler.close()
+        else:
+            write_jsonl(records, os.path.join(tmp, 'progress.jsonl'))
+
+        # Every handler is closed, so the scratch directory can be removed
+        handlers = []
+        try:
+            # A fresh handler has to read and parse the whole file
+            results['load_all_data (cold)'] = _time(
+                lambda: handlers[-1].load_all_data(), repeat, setup=lambda: handlers.append(open_handler()))
+            handler = handlers[-1]
+            results['load_all_data (warm)'] = _time(handler.load_all_data, repeat)
+
+            last_date = records[-1]['date']
+            results['get_latest_problems_and_exercises'] = _time(
+                lambda: handler.get_latest_problems_and_exercises(last_date), repeat)
+
+            all_data = handler.load_all_data()
+            results['validate_continuity (whole history)'] = _time(lambda: _validate_history(all_data), repeat)
+            results['charts.get_achievements'] = _time(lambda: charts.get_achievements(all_data), repeat)
+            results['create_daily_chart'] = _time(lambda: charts.create_daily_chart(all_data), repeat)
+            results['create_weekly_chart'] = _time(lambda: charts.create_weekly_chart(all_data), repeat)
+            results['create_monthly_chart'] = _time(lambda: charts.create_monthly_chart(all_data), repeat)
+
+            # Saves of new days after the end of the history; the first one also
+            # builds the derived stores, so it is taken before timing
+            next_day = [date.fromisoformat(last_date)]
+
+            def save_next_day():
+                next_day[0] += timedelta(days=1)
+                handler.update_date_record(next_day[0].isoformat(), ['1.1', '1.2'], [], 'benchmark')
+
+            save_next_day()
+            results['update_date_record (new day)'] = _time(save_next_day, repeat)
+            results['handler.get_achievements'] = _time(handler.get_achievements, repeat)
+        finally:
+            for opened in handlers:
+                opened.close()
+
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _previous_run(backend: str) -> Optional[Dict[str, Any]]:
+    """The most recent saved run for `backend`, if any."""
+    for path in sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')), reverse=True):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                run = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Could not read {path}: {e}")
+            continue
+        if run.get('backend') == backend:
+            run['path'] = path
+            return run
+    return None
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any], threshold: float) -> List[str]:
+    """Operations whose median got slower than previous * (1 + threshold)."""
+    regressions = []
+    for size, operations in current['results'].items():
+        for name, timing in operations.items():
+            before = previous['results'].get(size, {}).get(name)
+            if before and timing['median_ms'] > before['median_ms'] * (1 + threshold):
+                regressions.append(f"{size} {name}: {before['median_ms']:.1f} ms -> "
+                                   f"{timing['median_ms']:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=float, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--backend', choices=['jsonl', 'sqlite'], default='jsonl')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown of the median reported as a regression')
+    parser.add_argument('--no-save', action='store_true', help='do not write a results file')
+    args = parser.parse_args()
+
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'repeat': args.repeat,
+        'results': {}
+    }
+    for years in args.years:
+        size = f"{years:g}y"
+        results = bench_history(args.backend, years, args.repeat)
+        run['results'][size] = results
+        print(f"{size} ({args.backend}):")
+        for name, timing in results.items():
+            print(f"    {name:<38} median {timing['median_ms']:9.2f} ms   min {timing['min_ms']:9.2f} ms")
+
+    previous = _previous_run(args.backend)
+    regressions = compare(run, previous, args.threshold) if previous else []
+    if previous:
+        print(f"Compared with {os.path.basename(previous['path'])} (commit {previous.get('commit')}):")
+        for line in regressions:
+            print(f"    REGRESSION {line}")
+        if not regressions:
+            print(f"    no operation slower by more than {args.threshold:.0%}")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(run, f, ensure_ascii=False, indent=2)
+        print(f"Saved {path}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Realistic synthetic progress histories in the real progress.jsonl schema.
+
+Days are mostly (not always) recorded; Problems and Exercises continue
+consecutively across days and chapters (numbering restarts at 1.1 with each
+new book), and busy days carry dense Alcumus timestamp lists.
+
+    uv run python benchmarks/synthetic.py --years 5 --output /tmp/progress.jsonl
+"""
+import argparse
+import json
+import random
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any
+
+BOOKS = [
+    'Prealgebra',
+    'Introduction to Algebra',
+    'Introduction to Counting & Probability',
+    'Introduction to Number Theory',
+    'Introduction to Geometry',
+    'Intermediate Algebra',
+]
+CHAPTERS_PER_BOOK = 20
+START_DATE = date(2020, 1, 1)
+
+
+class _Book:
+    """Position in one book: the next Problem and the next Exercise.
+
+    Problems go chapter by chapter; Exercises trail behind and never move
+    past the chapter whose Problems are being worked on.
+    """
+
+    def __init__(self, name: str, rng: random.Random):
+        self.name = name
+        self.rng = rng
+        self.chapter = 1
+        self.problem = 1
+        self.problem_count = self._problem_count()
+        self.exercise_chapter = 1
+        self.exercise_section = 1
+        self.exercise_sections = self._exercise_sections()
+        self.exercise = 1
+        self.exercise_count = self._exercise_count()
+
+    def _problem_count(self) -> int:
+        return self.rng.randint(25, 60)
+
+    def _exercise_sections(self) -> int:
+        return self.rng.randint(4, 8)
+
+    def _exercise_count(self) -> int:
+        return self.rng.randint(4, 12)
+
+    @property
+    def finished(self) -> bool:
+        return self.chapter > CHAPTERS_PER_BOOK
+
+    @property
+    def exercises_available(self) -> bool:
+        return self.exercise_chapter < self.chapter or (
+            self.exercise_chapter == self.chapter and not self.finished)
+
+    def next_problem(self) -> str:
+        item = f"{self.chapter}.{self.problem}"
+        self.problem += 1
+        if self.problem > self.problem_count:
+            self.chapter += 1
+            self.problem = 1
+            self.problem_count = self._problem_count()
+        return item
+
+    def next_exercise(self) -> str:
+        item = f"{self.exercise_chapter}.{self.exercise_section}.{self.exercise}"
+        self.exercise += 1
+        if self.exercise > self.exercise_count:
+            self.exercise = 1
+            self.exercise_count = self._exercise_count()
+            self.exercise_section += 1
+            if self.exercise_section > self.exercise_sections:
+                self.exercise_chapter += 1
+                self.exercise_section = 1
+                self.exercise_sections = self._exercise_sections()
+        return item
+
+
+def generate_history(years: float, seed: int = 0, start: date = START_DATE,
+                     recorded_ratio: float = 0.85, alcumus_ratio: float = 0.6,
+                     max_alcumus: int = 60) -> List[Dict[str, Any]]:
+    """Generate `years` of daily records, sorted by date."""
+    rng = random.Random(seed)
+    book_index = 0
+    book = _Book(BOOKS[book_index], rng)
+    records = []
+
+    for offset in range(int(years * 365)):
+        if rng.random() > recorded_ratio:
+            continue
+        day = start + timedelta(days=offset)
+
+        problems = []
+        for _ in range(rng.choice([0, 2, 3, 4, 5, 6, 8])):
+            if book.finished:
+                break
+            problems.append(book.next_problem())
+        exercises = []
+        for _ in range(rng.choice([0, 0, 3, 5, 8])):
+            if not book.exercises_available:
+                break
+            exercises.append(book.next_exercise())
+
+        alcumus = []
+        if rng.random() < alcumus_ratio:
+            moment = datetime(day.year, day.month, day.day, rng.randint(7, 20), rng.randint(0, 59))
+            for _ in range(rng.randint(1, max_alcumus)):
+                moment += timedelta(seconds=rng.randint(20, 240))
+                if moment.date() != day:
+                    break
+                alcumus.append(moment.strftime('%Y-%m-%d %H:%M:%S'))
+
+        notes = rng.choice(['', '', '', '复习了错题', '做了竞赛模拟题', '阅读数学故事'])
+        records.append({
+            'date': day.isoformat(),
+            'problems': problems,
+            'exercises': exercises,
+            'alcumus': alcumus,
+            'notes': notes,
+            'book': book.name
+        })
+
+        if book.finished:
+            book_index = (book_index + 1) % len(BOOKS)
+            book = _Book(BOOKS[book_index], rng)
+
+    return records
+
+
+def write_jsonl(records: List[Dict[str, Any]], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic progress.jsonl')
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    records = generate_history(args.years, args.seed)
+    write_jsonl(records, args.output)
+    print(f"Wrote {len(records)} records to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
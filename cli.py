@@ -0,0 +1,374 @@
+"""Headless bulk import and export of progress records.
+
+Imports read JSONL (one record per line, same fields as progress.jsonl) or
+CSV (columns date, problems, exercises, alcumus, notes, book and optionally
+child) in date order. Every day is checked with the same rules as the input
+page (validate_problem_format, and validate_continuity against the day before
+it, stored or imported); only if the whole input is valid is each child's
+data merged in one atomic write. Imported days replace stored days with the
+same date. Input is streamed twice (check, then write) and never collected.
+
+Exports stream records page by page to CSV (re-importable) or Parquet (list
+columns plus per-day counts, for analytics; needs the `parquet` extra).
+
+    uv run python cli.py import history.jsonl --child alice
+    uv run python cli.py import days.csv --dry-run
+    uv run python cli.py export --format parquet --output progress.parquet --all-children
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.children import ChildRegistry, DEFAULT_CHILD_ID
+from utils.compact import expand_record
+from utils.validation import (
+    extract_alcumus_timestamps, validate_continuity, validate_problem_format
+)
+
+CSV_COLUMNS = ['child', 'date', 'problems', 'exercises', 'alcumus', 'notes', 'book']
+PAGE_SIZE = 500
+PARQUET_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 50
+
+
+class InputError(Exception):
+    """A line of an import file that cannot be turned into a record."""
+
+
+def _input_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.json'):
+        return 'jsonl'
+    raise ValueError(f"Cannot tell the format of {path}; use --format")
+
+
+def _read_rows(path: str, fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(line number, raw row) of an import file."""
+    if fmt == 'csv':
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            # Line 1 is the header
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if line:
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_number, InputError(f"Invalid JSON: {e}")
+                        continue
+                    if not isinstance(row, dict):
+                        yield line_number, InputError(f"Expected a JSON object, got {type(row).__name__}")
+                        continue
+                    try:
+                        row = expand_record(row)
+                    except (TypeError, ValueError) as e:
+                        yield line_number, InputError(f"Invalid compact encoding: {e}")
+                        continue
+                    yield line_number, row
+
+
+def _text(row: Dict[str, Any], field: str) -> str:
+    """A field that must be a string ('' if missing)."""
+    value = row.get(field)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise InputError(f"'{field}' must be a string, got {type(value).__name__}")
+    return value
+
+
+def _join(row: Dict[str, Any], field: str) -> str:
+    """CSV cells are strings already; JSONL fields are lists of strings."""
+    value = row.get(field)
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise InputError(f"'{field}' must be a string or a list of strings")
+    return ', '.join(value)
+
+
+def normalize_row(row: Dict[str, Any], default_child: str, books: Dict[str, str]) -> Tuple[str, Dict[str, Any]]:
+    """(child id, record) for one input row, checked like a save from the input page.
+
+    Problems and exercises may be given in either column; they are split by
+    kind with validate_problem_format. Alcumus timestamps are extracted from
+    the cell, whatever the separator.
+    """
+    child_id = _text(row, 'child').strip() or default_child
+    if child_id not in books:
+        raise InputError(f"Unknown child '{child_id}' (add it with: python -m utils.children add)")
+
+    date_str = _text(row, 'date').strip()
+    try:
+        datetime.strptime(date_str, '%Y-%m-%d')
+    except ValueError:
+        raise InputError(f"Invalid date: '{date_str}'")
+
+    items = ', '.join(part for part in (_join(row, 'problems'), _join(row, 'exercises')) if part)
+    is_valid, error, problems, exercises = validate_problem_format(items)
+    if not is_valid:
+        raise InputError(error)
+
+    return child_id, {
+        'date': date_str,
+        'problems': problems,
+        'exercises': exercises,
+        'alcumus': extract_alcumus_timestamps(_join(row, 'alcumus')),
+        'notes': _text(row, 'notes'),
+        'book': _text(row, 'book') or books[child_id]
+    }
+
+
+def iter_input(paths: List[str], fmt: Optional[str], default_child: str,
+               books: Dict[str, str]) -> Iterator[Tuple[str, Any]]:
+    """(location, (child id, record) or InputError) for every row of every file."""
+    for path in paths:
+        file_format = _input_format(path, fmt)
+        for line_number, row in _read_rows(path, file_format):
+            location = f"{path}:{line_number}"
+            if isinstance(row, InputError):
+                yield location, row
+                continue
+            try:
+                yield location, normalize_row(row, default_child, books)
+            except InputError as e:
+                yield location, e
+
+
+def iter_stored(handler, start_date: str = None, end_date: str = None) -> Iterator[Dict[str, Any]]:
+    """A child's stored records in date order, PAGE_SIZE at a time."""
+    offset = 0
+    while True:
+        page, _ = handler.query_records(start_date=start_date, end_date=end_date, offset=offset,
+                                        limit=PAGE_SIZE, newest_first=False)
+        yield from page
+        if len(page) < PAGE_SIZE:
+            return
+        offset += len(page)
+
+
+class _ChildCheck:
+    """Walks one child's stored records alongside its (date-ordered) imported ones."""
+
+    def __init__(self, handler):
+        self.stored = iter_stored(handler)
+        self.next_stored = next(self.stored, None)
+        self.previous: Optional[Dict[str, Any]] = None
+        self.last_date: Optional[str] = None
+        self.count = 0
+
+    def check(self, record: Dict[str, Any], continuity: bool) -> Optional[str]:
+        """Error message for the next imported record, or None if it is valid."""
+        date_str = record['date']
+        if self.last_date is not None and date_str <= self.last_date:
+            return f"Not in date order: {date_str} after {self.last_date}"
+
+        # The day before is the latest stored or imported record before this date
+        while self.next_stored is not None and self.next_stored['date'] <= date_str:
+            if self.next_stored['date'] < date_str:
+                self.previous = self.next_stored
+            self.next_stored = next(self.stored, None)
+
+        error = None
+        if continuity and self.previous is not None:
+            valid, message = validate_continuity(
+                record['problems'], record['exercises'],
+                self.previous.get('problems', []), self.previous.get('exercises', [])
+            )
+            if not valid:
+                error = f"{message} (previous day {self.previous['date']})"
+
+        self.previous = record
+        self.last_date = date_str
+        self.count += 1
+        return error
+
+
+def check_import(registry: ChildRegistry, paths: List[str], fmt: Optional[str], default_child: str,
+                 continuity: bool = True) -> Tuple[Dict[str, int], List[str], int]:
+    """First pass: validate everything without writing.
+
+    Returns (records per child, the first MAX_REPORTED_ERRORS errors, error count).
+    """
+    books = {child['id']: child['book'] for child in registry.list_children()}
+    checks: Dict[str, _ChildCheck] = {}
+    errors: List[str] = []
+    error_count = 0
+
+    for location, result in iter_input(paths, fmt, default_child, books):
+        error = None
+        if isinstance(result, InputError):
+            error = str(result)
+        else:
+            child_id, record = result
+            if child_id not in checks:
+                checks[child_id] = _ChildCheck(registry.get_handler(child_id))
+            error = checks[child_id].check(record, continuity)
+        if error:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"{location}: {error}")
+
+    return {child_id: check.count for child_id, check in checks.items()}, errors, error_count
+
+
+def run_import(registry: ChildRegistry, paths: List[str], fmt: Optional[str], default_child: str,
+               continuity: bool = True, dry_run: bool = False) -> bool:
+    counts, errors, error_count = check_import(registry, paths, fmt, default_child, continuity)
+    if error_count:
+        for error in errors:
+            print(error)
+        if error_count > len(errors):
+            print(f"... and {error_count - len(errors)} more")
+        print(f"{error_count} invalid record(s); nothing was imported")
+        return False
+
+    books = {child['id']: child['book'] for child in registry.list_children()}
+    for child_id, count in counts.items():
+        if not dry_run:
+            # Second pass: stream this child's records into one atomic write
+            registry.get_handler(child_id).import_records(
+                record for _, (row_child, record) in iter_input(paths, fmt, default_child, books)
+                if row_child == child_id
+            )
+        action = 'Checked' if dry_run else 'Imported'
+        print(f"{action} {count} record(s) for {child_id}")
+    return True
+
+
+def _export_rows(registry: ChildRegistry, child_ids: List[str], start_date: str = None,
+                 end_date: str = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for child_id in child_ids:
+        for record in iter_stored(registry.get_handler(child_id), start_date, end_date):
+            yield child_id, record
+
+
+def export_csv(rows: Iterator[Tuple[str, Dict[str, Any]]], output: str) -> int:
+    count = 0
+    with open(output, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for child_id, record in rows:
+            writer.writerow([
+                child_id,
+                record['date'],
+                ', '.join(record.get('problems', [])),
+                ', '.join(record.get('exercises', [])),
+                ', '.join(record.get('alcumus', [])),
+                record.get('notes', ''),
+                record.get('book', '')
+            ])
+            count += 1
+    return count
+
+
+def export_parquet(rows: Iterator[Tuple[str, Dict[str, Any]]], output: str) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (uv sync --extra parquet)")
+
+    strings = pa.list_(pa.string())
+    schema = pa.schema([
+        ('child', pa.string()),
+        ('date', pa.date32()),
+        ('problems', strings),
+        ('exercises', strings),
+        ('alcumus', strings),
+        ('problem_count', pa.int32()),
+        ('exercise_count', pa.int32()),
+        ('alcumus_count', pa.int32()),
+        ('notes', pa.string()),
+        ('book', pa.string()),
+    ])
+
+    count = 0
+    columns = {name: [] for name in schema.names}
+
+    def flush(writer):
+        writer.write_batch(pa.record_batch([columns[name] for name in schema.names], schema=schema))
+        for values in columns.values():
+            values.clear()
+
+    with pq.ParquetWriter(output, schema) as writer:
+        for child_id, record in rows:
+            problems = record.get('problems', [])
+            exercises = record.get('exercises', [])
+            alcumus = record.get('alcumus', [])
+            columns['child'].append(child_id)
+            columns['date'].append(datetime.strptime(record['date'], '%Y-%m-%d').date())
+            columns['problems'].append(problems)
+            columns['exercises'].append(exercises)
+            columns['alcumus'].append(alcumus)
+            columns['problem_count'].append(len(problems))
+            columns['exercise_count'].append(len(exercises))
+            columns['alcumus_count'].append(len(alcumus))
+            columns['notes'].append(record.get('notes', ''))
+            columns['book'].append(record.get('book', ''))
+            count += 1
+            if len(columns['date']) >= PARQUET_BATCH_SIZE:
+                flush(writer)
+        if columns['date'] or count == 0:
+            flush(writer)
+    return count
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Bulk import and export of progress records.')
+    parser.add_argument('--root', default='data', help='data directory (as used by the app)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='merge JSONL/CSV files into the data')
+    import_parser.add_argument('files', nargs='+')
+    import_parser.add_argument('--format', choices=['jsonl', 'csv'],
+                               help='input format (default: from the file extension)')
+    import_parser.add_argument('--child', default=DEFAULT_CHILD_ID,
+                               help='child for rows without a child column')
+    import_parser.add_argument('--no-continuity', action='store_true',
+                               help='only check the problem format (e.g. across book changes)')
+    import_parser.add_argument('--dry-run', action='store_true', help='check without writing')
+
+    export_parser = subparsers.add_parser('export', help='write records to CSV or Parquet')
+    export_parser.add_argument('--format', choices=['csv', 'parquet'], required=True)
+    export_parser.add_argument('--output', required=True)
+    export_parser.add_argument('--child', default=DEFAULT_CHILD_ID)
+    export_parser.add_argument('--all-children', action='store_true')
+    export_parser.add_argument('--start', help='first date (YYYY-MM-DD)')
+    export_parser.add_argument('--end', help='last date (YYYY-MM-DD)')
+
+    args = parser.parse_args(argv)
+    registry = ChildRegistry(args.root)
+
+    if args.command == 'import':
+        ok = run_import(registry, args.files, args.format, args.child,
+                        continuity=not args.no_continuity, dry_run=args.dry_run)
+        return 0 if ok else 1
+
+    if args.all_children:
+        child_ids = [child['id'] for child in registry.list_children()]
+    else:
+        registry.get_child(args.child)  # KeyError for unknown children
+        child_ids = [args.child]
+    rows = _export_rows(registry, child_ids, args.start, args.end)
+    exporter = export_csv if args.format == 'csv' else export_parquet
+    count = exporter(rows, args.output)
+    print(f"Exported {count} record(s) to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,18 @@
 import streamlit as st
 from datetime import datetime, timedelta
+import hashlib
 import sys
 import os
 
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.data_handler import DataHandler
+from utils.data_handler import ConflictError, record_version
+from utils.instrumentation import timed, timer
+from utils.session import get_active_child, get_writer, show_metrics_panel
 from utils.validation import (
-    validate_problem_format, validate_continuity, extract_alcumus_timestamps
+    validate_problem_format, validate_continuity, validate_batch, parse_batch_input,
+    iter_alcumus_timestamps, iter_text_chunks, unique_timestamps
 )
 
 # Page configuration
@@ -18,12 +22,76 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize data handler
-@st.cache_resource
-def get_data_handler():
-    return DataHandler()
+@st.cache_data(max_entries=16, show_spinner=False)
+def _extract_timestamps(text_hash: str, _text: str):
+    """Distinct timestamps of a paste; cached by the paste's hash."""
+    # Only a cache miss parses the paste
+    with timer('validation.iter_alcumus_timestamps'):
+        return list(unique_timestamps(iter_alcumus_timestamps(iter_text_chunks(_text))))
 
-data_handler = get_data_handler()
+
+@timed('input.extract_pasted_timestamps')
+def extract_pasted_timestamps(text: str, handler, date_str: str):
+    """Return (timestamps to save, timestamps already stored on other dates)."""
+    timestamps = _extract_timestamps(hashlib.sha1(text.encode('utf-8')).hexdigest(), text)
+    stored_elsewhere = {timestamp for timestamp, stored_date
+                        in handler.get_alcumus_dates(timestamps).items()
+                        if stored_date != date_str}
+    if not stored_elsewhere:
+        return timestamps, []
+    return ([t for t in timestamps if t not in stored_elsewhere],
+            [t for t in timestamps if t in stored_elsewhere])
+
+
+def show_continuity_issues(issues):
+    """Warn about gaps/overlaps/duplicates the save introduced or left in place."""
+    for issue in issues:
+        st.warning(f"⚠️ {issue['date']}: {issue['description']}")
+
+
+def show_saves(saves, refreshing: bool):
+    """Status of this session's background saves for the current child."""
+    for save in saves:
+        future = save['future']
+        if not future.done():
+            st.info(f"⏳ 正在保存 {save['date']} 的记录…")
+            continue
+        
+        error = future.exception()
+        if not save['shown']:
+            # First time the outcome is seen: settle versions and look for issues once
+            save['shown'] = True
+            if error is None:
+                # Edits to past dates can break continuity with later days
+                save['issues'] = data_handler.get_continuity_issues(save['date'])
+            elif isinstance(error, ConflictError):
+                # Accept the newer version; saving again will overwrite it
+                loaded_versions[(child['id'], save['date'])] = \
+                    data_handler.get_record_version(save['date'])
+        
+        if error is None:
+            st.success("✅ 进度已成功更新！")
+            if save['summary']:
+                st.info(f"📝 已保存：{save['summary']}")
+            show_continuity_issues(save['issues'])
+        elif isinstance(error, ConflictError):
+            st.error("❌ 这一天的记录刚刚在其他地方被修改过。请检查最新内容后再次点击更新。")
+        else:
+            st.error(f"❌ 保存失败：{str(error)}")
+    
+    if refreshing and all(save['future'].done() for save in saves):
+        # Every save has finished: a full run stops the fragment's timer, and
+        # keeps the outcomes just shown for that run
+        st.session_state['keep_saves'] = True
+        st.rerun()
+
+
+# Data handler for the child selected in the sidebar
+child, data_handler = get_active_child()
+
+# Saves go through a background writer; until written, reads through it
+# return the queued record
+writer = get_writer(child)
 
 # Main content
 st.title("📝 输入今日学习进度")
@@ -44,10 +112,17 @@ with col2:
 date_str = selected_date.strftime('%Y-%m-%d')
 
 # Show current book
-st.info("**当前书籍：** Introduction to Algebra")
+st.info(f"**当前书籍：** {child['book']}")
 
 # Load existing data for this date
-existing_data = data_handler.get_data_by_date(date_str)
+existing_data = writer.get_data_by_date(date_str)
+
+# Version of the record this session is editing (settled below, once the
+# form's values are known), so a save never silently overwrites another
+# session's newer change
+loaded_versions = st.session_state.setdefault('loaded_versions', {})
+version_key = (child['id'], date_str)
+existing_version = writer.get_record_version(date_str)
 existing_problems_str = ", ".join(existing_data.get('problems', []))
 existing_exercises_str = ", ".join(existing_data.get('exercises', []))
 existing_notes = existing_data.get('notes', '')
@@ -82,7 +157,9 @@ alcumus_input = st.text_area(
 
 # Show extracted timestamps preview
 if alcumus_input.strip():
-    preview_timestamps = extract_alcumus_timestamps(alcumus_input)
+    preview_timestamps, skipped_timestamps = extract_pasted_timestamps(alcumus_input, data_handler, date_str)
+    if skipped_timestamps:
+        st.caption(f"⏭️ {len(skipped_timestamps)} 个时间戳已记录在其他日期，保存时将跳过")
     if preview_timestamps:
         st.info(f"📋 检测到 {len(preview_timestamps)} 个时间戳：")
         # Display timestamps in a compact format
@@ -90,7 +167,7 @@ if alcumus_input.strip():
         if len(preview_timestamps) > 10:
             timestamp_display += f" ... (还有 {len(preview_timestamps) - 10} 个)"
         st.caption(timestamp_display)
-    else:
+    elif not skipped_timestamps:
         st.warning("⚠️ 未检测到有效的时间戳格式 (YYYY-MM-DD HH:MM:SS)")
 
 st.subheader("学习笔记")
@@ -101,6 +178,13 @@ notes_input = st.text_area(
     height=100
 )
 
+# The form shows the record as stored: adopt its version unless the user has
+# an unsaved edit, which must still be checked against the version it started from
+form_unedited = (problems_input, alcumus_input, notes_input) == \
+    (existing_combined, existing_alcumus_str, existing_notes)
+if version_key not in loaded_versions or form_unedited:
+    loaded_versions[version_key] = existing_version
+
 # Validation and update
 if st.button("更新进度", type="primary"):
     # Validate format
@@ -112,7 +196,7 @@ if st.button("更新进度", type="primary"):
         # Get previous day's data for continuity check
         previous_date = selected_date - timedelta(days=1)
         previous_date_str = previous_date.strftime('%Y-%m-%d')
-        prev_problems, prev_exercises = data_handler.get_latest_problems_and_exercises(date_str)
+        prev_problems, prev_exercises = writer.get_latest_problems_and_exercises(date_str)
         
         # Validate continuity
         continuity_valid, continuity_error = validate_continuity(
@@ -123,29 +207,120 @@ if st.button("更新进度", type="primary"):
             st.error(f"❌ {continuity_error}")
         else:
             # Extract Alcumus timestamps
-            alcumus_timestamps = extract_alcumus_timestamps(alcumus_input)
+            alcumus_timestamps, _ = extract_pasted_timestamps(alcumus_input, data_handler, date_str)
+            
+            # Queue the save; backup and rewrite happen on the writer thread
+            record = {
+                'date': date_str,
+                'problems': problems_list,
+                'exercises': exercises_list,
+                'alcumus': alcumus_timestamps,
+                'notes': notes_input,
+                'book': child['book']
+            }
+            future = writer.submit(record, expected_version=loaded_versions[version_key])
+            # The version the record will have once written
+            loaded_versions[version_key] = record_version(record)
+            
+            # Summary of what was saved
+            saved_info = []
+            if problems_list or exercises_list:
+                saved_items = problems_list + exercises_list
+                saved_info.append(f"AOPS: {', '.join(saved_items)}")
+            if alcumus_timestamps:
+                saved_info.append(f"Alcumus: {len(alcumus_timestamps)}道题")
             
-            # Save data
-            try:
-                data_handler.update_date_record(
-                    date_str, problems_list, exercises_list, notes_input,
-                    alcumus=alcumus_timestamps
-                )
-                st.success("✅ 进度已成功更新！")
-                
-                # Show what was saved
-                saved_info = []
-                if problems_list or exercises_list:
-                    saved_items = problems_list + exercises_list
-                    saved_info.append(f"AOPS: {', '.join(saved_items)}")
-                if alcumus_timestamps:
-                    saved_info.append(f"Alcumus: {len(alcumus_timestamps)}道题")
-                
-                if saved_info:
-                    st.info(f"📝 已保存：{' | '.join(saved_info)}")
-                
-            except Exception as e:
-                st.error(f"❌ 保存失败：{str(e)}")
+            st.session_state.setdefault('saves', []).append({
+                'child_id': child['id'],
+                'date': date_str,
+                'future': future,
+                'summary': ' | '.join(saved_info),
+                'shown': False,
+                'issues': []
+            })
+
+# Outcomes already shown are dropped on the next full run; while a save is
+# still running, the status below refreshes itself
+saves = st.session_state.setdefault('saves', [])
+if not st.session_state.pop('keep_saves', False):
+    saves[:] = [save for save in saves if not (save['shown'] and save['child_id'] == child['id'])]
+child_saves = [save for save in saves if save['child_id'] == child['id']]
+if child_saves:
+    running = any(not save['future'].done() for save in child_saves)
+    st.fragment(run_every=0.5 if running else None)(show_saves)(child_saves, running)
+
+# Back-fill many days at once (e.g. from paper records)
+with st.expander("📅 批量补录"):
+    batch_input = st.text_area(
+        "每行一天：日期: 题目（逗号分隔）",
+        placeholder="2025-09-01: 15.1, 15.2, 15.3\n2025-09-02: 15.4, 15.5, 15.1.1",
+        help="已有记录的日期只替换题目，Alcumus 和笔记保持不变",
+        height=150
+    )
+    
+    if st.button("批量保存"):
+        batch_days, format_errors = parse_batch_input(batch_input)
+        if format_errors:
+            for error in format_errors:
+                st.error(f"❌ {error}")
+        elif not batch_days:
+            st.warning("⚠️ 没有需要保存的记录")
+        else:
+            # Queued single-day saves land first, so the batch sees them
+            writer.flush()
+            # Saved days around and between the batch days
+            first_date = datetime.strptime(batch_days[0]['date'], '%Y-%m-%d')
+            last_date = datetime.strptime(batch_days[-1]['date'], '%Y-%m-%d')
+            before, _ = data_handler.query_records(
+                end_date=(first_date - timedelta(days=1)).strftime('%Y-%m-%d'), limit=1
+            )
+            within, _ = data_handler.query_records(
+                batch_days[0]['date'], batch_days[-1]['date'], newest_first=False
+            )
+            after, _ = data_handler.query_records(
+                start_date=(last_date + timedelta(days=1)).strftime('%Y-%m-%d'), limit=1,
+                newest_first=False
+            )
+            batch_errors = validate_batch(batch_days, before + within + after)
+            if batch_errors:
+                for error_date, error in batch_errors:
+                    st.error(f"❌ {error_date}: {error}")
+            else:
+                records = []
+                expected_versions = {}
+                for day in batch_days:
+                    existing = data_handler.get_data_by_date(day['date'])
+                    # The version this session loaded, else the one the record is built from
+                    expected_versions[day['date']] = loaded_versions.get(
+                        (child['id'], day['date']), record_version(existing)
+                    )
+                    records.append({
+                        'date': day['date'],
+                        'problems': day['problems'],
+                        'exercises': day['exercises'],
+                        'alcumus': existing.get('alcumus', []),
+                        'notes': existing.get('notes', ''),
+                        'book': existing.get('book', child['book'])
+                    })
+                try:
+                    data_handler.update_date_records(records, expected_versions)
+                    for record in records:
+                        loaded_versions[(child['id'], record['date'])] = \
+                            data_handler.get_record_version(record['date'])
+                    st.success(f"✅ 已保存 {len(records)} 天的记录！")
+                    batch_dates = {record['date'] for record in records}
+                    show_continuity_issues([
+                        issue for issue in data_handler.get_continuity_issues()
+                        if issue['date'] in batch_dates or issue['other_date'] in batch_dates
+                    ])
+                except ConflictError:
+                    # Accept the newer versions; saving again will overwrite them
+                    for record in records:
+                        loaded_versions[(child['id'], record['date'])] = \
+                            data_handler.get_record_version(record['date'])
+                    st.error("❌ 补录的日期中有记录刚刚在其他地方被修改过。请检查最新内容后再次保存。")
+                except Exception as e:
+                    st.error(f"❌ 保存失败：{str(e)}")
 
 # Sidebar tips
 st.sidebar.markdown("---")
@@ -154,3 +329,6 @@ st.sidebar.markdown("• Problem格式：15.1")
 st.sidebar.markdown("• Exercise格式：15.1.5")
 st.sidebar.markdown("• 题目必须连续完成")
 st.sidebar.markdown("• 可以任意日期补录数据")
+
+# Timings of this rerun (only with CHILD_PROGRESS_METRICS=1)
+show_metrics_panel('input')
@@ -6,10 +6,9 @@ import os
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.data_handler import DataHandler
-from utils.charts import (
-    create_daily_chart, create_weekly_chart, create_monthly_chart,
-    get_achievements
+from utils.session import (
+    get_active_child, load_aggregates, get_achievements, get_chart,
+    show_metrics_panel
 )
 
 # Page configuration
@@ -20,21 +19,16 @@ st.set_page_config(
 )
 
 
-# Initialize data handler
-@st.cache_resource
-def get_data_handler():
-    return DataHandler()
-
-
-data_handler = get_data_handler()
+# Data handler for the child selected in the sidebar
+child, data_handler = get_active_child()
 
 # Main content
 st.title("📊 学习进度概览")
 
-# Load all data
-all_data = data_handler.load_all_data()
+# Per-day dates and counts, memory-mapped; no record is loaded on this page
+columns = data_handler.get_columns()
 
-if not all_data:
+if not len(columns):
     st.info("还没有学习记录，请先去输入进度页面添加数据。")
 else:
     # Missing dates warning
@@ -44,12 +38,11 @@ else:
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=13)
     
-    existing_dates = {record['date'] for record in all_data}
     missing_dates = []
     
     current_date = start_date
     while current_date <= end_date:
-        if current_date.strftime('%Y-%m-%d') not in existing_dates:
+        if not columns.contains(current_date.strftime('%Y-%m-%d')):
             missing_dates.append(current_date)
         current_date += timedelta(days=1)
     
@@ -61,7 +54,7 @@ else:
     
     # Achievements list
     st.subheader("🏆 成就列表")
-    achievements = get_achievements(all_data)
+    achievements = get_achievements(child, data_handler)
     
     if achievements:
         for achievement in achievements:
@@ -75,14 +68,37 @@ else:
     else:
         st.info("还没有完成任何成就，继续学习获得你的第一个成就吧！")
     
-    # Charts
+    # Charts; pandas and plotly are only imported from here on
+    from utils.charts import DAILY_MAX_POINTS
+    
     st.subheader("📈 学习趋势图表")
     
-    # Daily chart
-    st.plotly_chart(create_daily_chart(all_data), use_container_width=True)
+    # Figures are cached per data version and shared across sessions; the
+    # tables behind them are parsed once, with weekly and monthly totals
+    # taken from the handler's materialized rollups
+    aggregates = load_aggregates(child, data_handler)
+    
+    # Daily chart; long histories are downsampled, and picking a shorter
+    # window here redraws it in full detail
+    daily_range = None
+    daily_dates = aggregates.daily['date']
+    if len(daily_dates) > DAILY_MAX_POINTS:
+        first_day, last_day = daily_dates.iloc[0].date(), daily_dates.iloc[-1].date()
+        daily_range = st.slider(
+            "每日图表时间范围",
+            min_value=first_day,
+            max_value=last_day,
+            value=(first_day, last_day),
+            format="YYYY-MM-DD"
+        )
+    st.plotly_chart(get_chart(child, data_handler, 'daily', daily_range),
+                    use_container_width=True)
     
     # Weekly chart
-    st.plotly_chart(create_weekly_chart(all_data), use_container_width=True)
+    st.plotly_chart(get_chart(child, data_handler, 'weekly'), use_container_width=True)
     
     # Monthly chart
-    st.plotly_chart(create_monthly_chart(all_data), use_container_width=True)
+    st.plotly_chart(get_chart(child, data_handler, 'monthly'), use_container_width=True)
+
+# Timings of this rerun (only with CHILD_PROGRESS_METRICS=1)
+show_metrics_panel('overview')
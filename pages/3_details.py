@@ -1,12 +1,12 @@
 import streamlit as st
 import sys
 import os
-import pandas as pd
+from datetime import date
 
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.data_handler import DataHandler
+from utils.session import get_active_child, show_metrics_panel
 
 # Page configuration
 st.set_page_config(
@@ -15,57 +15,94 @@ st.set_page_config(
     layout="wide"
 )
 
+PAGE_SIZES = [25, 50, 100]
+ALL_CHAPTERS = '全部'
 
-# Initialize data handler
-@st.cache_resource
-def get_data_handler():
-    return DataHandler()
+
+def build_table_row(record):
+    """One table row; the details string is only built for visible rows."""
+    problems = record.get('problems', [])
+    exercises = record.get('exercises', [])
+    alcumus = record.get('alcumus', [])
+    notes = record.get('notes', '').strip()
+    
+    # Build details string
+    details_parts = []
+    if problems:
+        details_parts.append(f"Problems: {', '.join(problems)}")
+    if exercises:
+        details_parts.append(f"Exercises: {', '.join(exercises)}")
+    if alcumus:
+        details_parts.append(f"Alcumus: {', '.join(alcumus)}")
+    
+    details = " | ".join(details_parts) if details_parts else ""
+    
+    return {
+        '日期': record['date'],
+        'Problem数量': len(problems),
+        'Exercise数量': len(exercises),
+        'Alcumus数量': len(alcumus),
+        'Note': notes if notes else "",
+        'Details': details
+    }
 
 
-data_handler = get_data_handler()
+# Data handler for the child selected in the sidebar
+child, data_handler = get_active_child()
 
 # Main content
 st.title("📋 学习进度详情")
 
-# Load all data
-all_data = data_handler.load_all_data()
+first_date, last_date = data_handler.get_date_range()
 
-if not all_data:
+if first_date is None:
     st.info("还没有学习记录，请先去输入进度页面添加数据。")
 else:
-    st.subheader(f"总计 {len(all_data)} 天的学习记录")
+    # Filters are applied by the handler against its indexes
+    first_day, last_day = date.fromisoformat(first_date), date.fromisoformat(last_date)
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        date_range = st.date_input(
+            "日期范围",
+            value=(first_day, last_day),
+            min_value=first_day,
+            max_value=last_day
+        )
+    with col2:
+        chapter = st.selectbox(
+            "章节",
+            [ALL_CHAPTERS] + data_handler.get_columns().chapters(),
+            format_func=lambda c: c if c == ALL_CHAPTERS else f"第{c}章"
+        )
+    with col3:
+        page_size = st.selectbox("每页天数", PAGE_SIZES, index=1)
     
-    # Sort by date (newest first)
-    all_data_sorted = sorted(all_data, key=lambda x: x['date'], reverse=True)
+    # While a range is being picked only its start is set
+    start_day = date_range[0] if date_range else first_day
+    end_day = date_range[1] if len(date_range) > 1 else last_day
+    filters = {
+        'start_date': start_day.strftime('%Y-%m-%d'),
+        'end_date': end_day.strftime('%Y-%m-%d'),
+        'chapter': None if chapter == ALL_CHAPTERS else chapter
+    }
     
-    # Prepare data for table
-    table_data = []
-    for record in all_data_sorted:
-        problems = record.get('problems', [])
-        exercises = record.get('exercises', [])
-        alcumus = record.get('alcumus', [])
-        notes = record.get('notes', '').strip()
-        
-        # Build details string
-        details_parts = []
-        if problems:
-            details_parts.append(f"Problems: {', '.join(problems)}")
-        if exercises:
-            details_parts.append(f"Exercises: {', '.join(exercises)}")
-        if alcumus:
-            details_parts.append(f"Alcumus: {', '.join(alcumus)}")
+    _, total = data_handler.query_records(limit=0, **filters)
+    st.subheader(f"总计 {total} 天的学习记录")
+    
+    if total:
+        page_count = (total + page_size - 1) // page_size
+        page = st.number_input("页码", min_value=1, max_value=page_count, value=1, step=1)
         
-        details = " | ".join(details_parts) if details_parts else ""
+        # Newest first, one page at a time
+        records, _ = data_handler.query_records(
+            offset=(page - 1) * page_size, limit=page_size, newest_first=True, **filters
+        )
+        # pandas is only needed once there is a table to show
+        import pandas as pd
         
-        table_data.append({
-            '日期': record['date'],
-            'Problem数量': len(problems),
-            'Exercise数量': len(exercises),
-            'Alcumus数量': len(alcumus),
-            'Note': notes if notes else "",
-            'Details': details
-        })
-    
-    # Create and display DataFrame
-    df = pd.DataFrame(table_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
+        df = pd.DataFrame([build_table_row(record) for record in records])
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        st.caption(f"第 {page} / {page_count} 页")
+
+# Timings of this rerun (only with CHILD_PROGRESS_METRICS=1)
+show_metrics_panel('details')
@@ -0,0 +1,93 @@
+import os
+import random
+import sys
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audit import ContinuityAudit, audit_records  # noqa: E402
+
+ALGEBRA = 'Introduction to Algebra'
+COUNTING = 'Introduction to Counting & Probability'
+
+
+def _record(date_str: str, problems, book: str = ALGEBRA) -> dict:
+    return {'date': date_str, 'problems': list(problems), 'exercises': [], 'alcumus': [],
+            'notes': '', 'book': book}
+
+
+def _issues(records) -> list:
+    audit = ContinuityAudit()
+    audit.rebuild(records)
+    return [(issue['type'], issue['date'], issue['other_date']) for issue in audit.issues()]
+
+
+def test_books_reusing_numbers_are_audited_separately():
+    records = [
+        _record('2024-01-01', ['1.1', '1.2'], ALGEBRA),
+        _record('2024-01-02', ['1.1', '1.2'], COUNTING),
+        _record('2024-01-03', ['1.3', '1.4'], ALGEBRA),
+        _record('2024-01-04', ['1.3'], COUNTING),
+    ]
+    assert _issues(records) == []
+
+
+def test_duplicate_overlap_and_gap_within_a_book():
+    records = [
+        _record('2024-01-01', ['1.1', '1.2', '1.3']),
+        _record('2024-01-02', ['1.3']),
+        _record('2024-01-03', ['1.2', '1.3', '1.4']),
+        _record('2024-01-04', ['1.6']),
+    ]
+    issues = _issues(records)
+    assert ('duplicate', '2024-01-02', '2024-01-01') in issues
+    assert ('duplicate', '2024-01-03', '2024-01-01') in issues
+    assert ('gap', '2024-01-04', '2024-01-03') in issues
+
+
+def test_ranges_overlapping_earlier_days():
+    records = [
+        _record('2024-01-01', ['1.1', '1.2', '1.3', '1.4']),
+        _record('2024-01-02', ['1.5']),
+        _record('2024-01-03', ['1.2', '1.3']),
+    ]
+    issues = _issues(records)
+    assert ('duplicate', '2024-01-03', '2024-01-01') in issues
+    # Going back from 1.5 to 1.2 is reported once, as a step back to 01-02
+    assert ('overlap', '2024-01-03', '2024-01-02') in issues
+    assert not any(date != '2024-01-03' for _, date, _ in issues)
+
+
+def test_changing_a_records_book_rechecks_both_books():
+    audit = ContinuityAudit()
+    first = _record('2024-01-01', ['1.1', '1.2'])
+    second = _record('2024-01-02', ['1.1'], COUNTING)
+    audit.rebuild([first, second])
+    assert audit.issues() == []
+
+    moved = _record('2024-01-02', ['1.1'])
+    audit.apply_changes([('2024-01-02', second, moved)])
+    assert [(i['type'], i['date']) for i in audit.issues()] == [('duplicate', '2024-01-02')]
+
+    audit.apply_changes([('2024-01-02', moved, second)])
+    assert audit.issues() == []
+
+
+def test_incremental_updates_match_a_full_audit():
+    rng = random.Random(7)
+    items = [f'1.{n}' for n in range(1, 40)]
+    stored = {}
+    audit = ContinuityAudit()
+    audit.rebuild([])
+    for _ in range(300):
+        date_str = f'2024-01-{rng.randint(1, 20):02d}'
+        before = stored.get(date_str)
+        if before is not None and rng.random() < 0.2:
+            after = None
+            del stored[date_str]
+        else:
+            start = rng.randrange(len(items) - 4)
+            after = _record(date_str, items[start:start + rng.randint(1, 4)], rng.choice([ALGEBRA, COUNTING]))
+            stored[date_str] = after
+        audit.apply_changes([(date_str, before, after)])
+        assert audit.issues() == audit_records([stored[d] for d in sorted(stored)])
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.children import ChildRegistry  # noqa: E402
+
+
+def _record(notes: str) -> dict:
+    return {'date': '2024-01-01', 'problems': ['1.1'], 'exercises': [], 'alcumus': [],
+            'notes': notes, 'book': 'Introduction to Algebra'}
+
+
+@pytest.mark.parametrize('backend', ['jsonl', 'sqlite'])
+def test_evicted_handler_and_writer_keep_working(backend, tmp_path, monkeypatch):
+    monkeypatch.setenv('CHILD_PROGRESS_DURABILITY', 'group')
+    registry = ChildRegistry(str(tmp_path), backend=backend, max_open_handlers=1)
+    registry.add_child('a', 'A')
+    registry.add_child('b', 'B')
+
+    # A session is still using child a when another session opens child b
+    handler = registry.get_handler('a')
+    writer = registry.get_writer('a')
+    writer.submit(_record('before eviction')).result(timeout=5)
+    registry.get_writer('b')
+    assert 'a' not in registry._handlers
+
+    writer.submit(_record('after eviction')).result(timeout=5)
+    assert handler.get_data_by_date('2024-01-01')['notes'] == 'after eviction'
+    handler.update_date_records([_record('direct save')])
+    assert handler.get_rollups().version == handler.get_version()
+    writer.close()
+    handler.close()
+
+    reopened = registry.get_handler('a')
+    assert reopened is not handler
+    assert reopened.get_data_by_date('2024-01-01')['notes'] == 'direct save'
@@ -0,0 +1,80 @@
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cli import check_import, main  # noqa: E402
+from utils.children import ChildRegistry  # noqa: E402
+
+
+def _write_jsonl(path, rows) -> str:
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+    return str(path)
+
+
+@pytest.mark.parametrize('row', [
+    {'child': 3, 'date': '2024-01-01', 'problems': ['1.1']},
+    {'date': 20240101, 'problems': ['1.1']},
+    {'date': '2024-01-01', 'problems': ['1.1', 2]},
+    {'date': '2024-01-01', 'problems': {'1.1': True}},
+    {'date': '2024-01-01', 'problems': ['1.1'], 'notes': ['a']},
+    {'date': '2024-01-01', 'encoding': 'runs', 'problems': [[1, 2]]},
+])
+def test_mistyped_fields_are_reported_not_raised(row, tmp_path):
+    registry = ChildRegistry(str(tmp_path / 'data'))
+    path = _write_jsonl(tmp_path / 'import.jsonl', [row])
+    counts, errors, error_count = check_import(registry, [path], None, 'default')
+    assert error_count == 1
+    assert errors[0].startswith(f"{path}:1: ")
+
+
+def _history() -> list:
+    return [
+        {'date': '2024-01-01', 'problems': ['1.1', '1.2'], 'exercises': ['1.1.1'],
+         'alcumus': ['2024-01-01 09:00:00'], 'notes': 'first, day', 'book': 'Introduction to Algebra'},
+        {'date': '2024-01-02', 'problems': ['1.3'], 'exercises': ['1.1.2', '1.1.3'],
+         'alcumus': [], 'notes': '', 'book': 'Introduction to Algebra'},
+        {'date': '2024-01-05', 'problems': [], 'exercises': [],
+         'alcumus': ['2024-01-05 10:00:00', '2024-01-05 10:01:30'], 'notes': '"quoted"',
+         'book': 'Introduction to Algebra'},
+    ]
+
+
+def test_import_export_round_trip(tmp_path):
+    first_root, second_root = str(tmp_path / 'first'), str(tmp_path / 'second')
+    source = _write_jsonl(tmp_path / 'history.jsonl', _history())
+    exported = str(tmp_path / 'export.csv')
+    reexported = str(tmp_path / 'reexport.csv')
+
+    assert main(['--root', first_root, 'import', source]) == 0
+    assert ChildRegistry(first_root).get_handler('default').load_all_data() == _history()
+    assert main(['--root', first_root, 'export', '--format', 'csv', '--output', exported]) == 0
+
+    # The CSV export imports back to the same records
+    assert main(['--root', second_root, 'import', exported]) == 0
+    assert ChildRegistry(second_root).get_handler('default').load_all_data() == _history()
+    assert main(['--root', second_root, 'export', '--format', 'csv', '--output', reexported]) == 0
+    with open(exported, encoding='utf-8') as a, open(reexported, encoding='utf-8') as b:
+        assert a.read() == b.read()
+    with open(exported, encoding='utf-8', newline='') as f:
+        assert [row['date'] for row in csv.DictReader(f)] == ['2024-01-01', '2024-01-02', '2024-01-05']
+
+
+def test_parquet_export(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    root = str(tmp_path / 'data')
+    source = _write_jsonl(tmp_path / 'history.jsonl', _history())
+    output = str(tmp_path / 'export.parquet')
+    assert main(['--root', root, 'import', source]) == 0
+    assert main(['--root', root, 'export', '--format', 'parquet', '--output', output]) == 0
+
+    table = pq.read_table(output).to_pylist()
+    assert [row['problems'] for row in table] == [record['problems'] for record in _history()]
+    assert [row['alcumus_count'] for row in table] == [1, 0, 2]
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compact import (  # noqa: E402
+    compact_record, decode_runs, decode_timestamps, encode_items, encode_timestamps, expand_record
+)
+
+
+@pytest.mark.parametrize('items', [
+    [],
+    ['15.1', '15.2', '15.3', '16.1'],
+    ['15.1.1', '15.1.2', '15.2.1', '15.2.2', '15.2.3'],
+    ['15.3', '15.2', '15.2', '15.4'],
+    ['15.01', '15.2', 'x', '15.9', '15.10'],
+])
+def test_items_round_trip(items):
+    assert decode_runs(encode_items(items)) == items
+
+
+def test_consecutive_items_become_ranges():
+    assert encode_items(['15.1', '15.2', '15.3', '15.3.1', '15.3.2', '16.1']) == \
+        [[15, 1, 3], [15, 3, 1, 2], '16.1']
+
+
+@pytest.mark.parametrize('timestamps', [
+    [],
+    ['2025-09-01 12:45:52', '2025-09-01 12:47:03', '2025-09-02 00:00:00'],
+    # Out of order, repeated, and strings that are not canonical timestamps
+    ['2025-09-01 23:59:59', '2025-09-01 08:00:00', '2025-09-01 08:00:00', '2025-09-01 24:00:00',
+     'not a timestamp', '2025-09-01 08:00:01'],
+])
+def test_timestamps_round_trip(timestamps):
+    assert decode_timestamps(encode_timestamps(timestamps)) == timestamps
+
+
+def test_record_round_trip():
+    record = {'date': '2025-09-01', 'problems': ['15.1', '15.2', '15.3'],
+              'exercises': ['15.1.1', '15.1.2'], 'alcumus': ['2025-09-01 12:45:52'],
+              'notes': 'paper', 'book': 'Introduction to Algebra'}
+    compact = compact_record(record)
+    assert compact['encoding'] == 'runs'
+    assert expand_record(compact) == record
+    # Plain records are read unchanged
+    assert expand_record(record) is record
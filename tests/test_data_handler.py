@@ -0,0 +1,76 @@
+import glob
+import json
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_handler import DataHandler  # noqa: E402
+
+
+def _record(date_str: str) -> dict:
+    return {'date': date_str, 'problems': ['1.1'], 'exercises': [], 'alcumus': [],
+            'notes': '', 'book': 'Introduction to Algebra'}
+
+
+def _handler(tmp_path) -> DataHandler:
+    return DataHandler(str(tmp_path / 'progress.jsonl'), str(tmp_path / 'backups'),
+                       append_only=True, compact_threshold=0)
+
+
+def _tear_last_line(handler: DataHandler):
+    # Another process crashed in the middle of an append
+    with open(handler.data_file, 'ab') as f:
+        f.write(b'{"date": "2024-01-1')
+
+
+def test_torn_last_line_is_skipped_on_read_and_repaired_on_write(tmp_path):
+    handler = _handler(tmp_path)
+    for day in range(1, 10):
+        handler.update_date_records([_record(f'2024-01-{day:02d}')])
+    _tear_last_line(handler)
+    size = os.path.getsize(handler.data_file)
+
+    with pytest.warns(UserWarning):
+        assert len(_handler(tmp_path).load_all_data()) == 9
+    # Reading leaves the file alone
+    assert os.path.getsize(handler.data_file) == size
+    assert not glob.glob(handler.data_file + '.before-recovery-*')
+
+    with pytest.warns(UserWarning):
+        handler.update_date_records([_record('2024-01-10')])
+    assert len(handler.load_all_data()) == 10
+    assert len(_handler(tmp_path).load_all_data()) == 10
+    kept = glob.glob(handler.data_file + '.before-recovery-*')
+    assert len(kept) == 1
+    with open(kept[0], 'rb') as f:
+        assert f.read().endswith(b'{"date": "2024-01-1')
+
+
+def test_recover_restores_a_torn_file_from_the_journal(tmp_path):
+    handler = _handler(tmp_path)
+    for day in range(1, 10):
+        handler.update_date_records([_record(f'2024-01-{day:02d}')])
+    _tear_last_line(handler)
+
+    reopened = _handler(tmp_path)
+    assert reopened.recover() is not None
+    assert len(reopened.load_all_data()) == 9
+    with open(handler.data_file, 'rb') as f:
+        assert f.read().endswith(b'\n')
+    assert reopened.recover() is None
+
+
+def test_unreadable_line_inside_the_file_raises(tmp_path):
+    handler = _handler(tmp_path)
+    handler.update_date_records([_record('2024-01-01')])
+    with open(handler.data_file, 'a', encoding='utf-8') as f:
+        f.write('garbage\n' + json.dumps(_record('2024-01-02')) + '\n')
+
+    with pytest.raises(ValueError):
+        handler.update_date_records([_record('2024-01-03')])
+    with open(handler.data_file, encoding='utf-8') as f:
+        assert f.read().count('\n') == 3
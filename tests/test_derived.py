@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_handler import create_data_handler  # noqa: E402
+
+
+def _record(day: int) -> dict:
+    return {'date': f'2024-01-{day:02d}', 'problems': [f'1.{day}'], 'exercises': [], 'alcumus': [],
+            'notes': '', 'book': 'Introduction to Algebra'}
+
+
+def _open(backend: str, tmp_path):
+    if backend == 'sqlite':
+        return create_data_handler('sqlite', db_file=str(tmp_path / 'progress.db'), durability='none')
+    return create_data_handler('jsonl', data_file=str(tmp_path / 'progress.jsonl'),
+                               backup_dir=str(tmp_path / 'backups'), durability='none')
+
+
+def _run_threads(targets, timeout: float = 60):
+    errors = []
+
+    def guarded(target):
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=guarded, args=(target,), daemon=True) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout)
+    assert not any(thread.is_alive() for thread in threads), "threads deadlocked"
+    assert not errors, errors
+
+
+@pytest.mark.parametrize('backend', ['jsonl', 'sqlite'])
+def test_saves_and_derived_reads_do_not_deadlock(backend, tmp_path):
+    handler = _open(backend, tmp_path)
+    done = threading.Event()
+
+    def write():
+        try:
+            for day in range(1, 29):
+                handler.update_date_records([_record(day)])
+        finally:
+            done.set()
+
+    def read():
+        while not done.is_set():
+            handler.get_rollups()
+            handler.get_achievements()
+            handler.get_continuity_issues()
+
+    _run_threads([write, read, read, read])
+    assert handler.get_rollups().version == handler.get_version()
+    handler.close()
+
+
+def test_in_place_updates_are_persisted_lazily(tmp_path):
+    handler = _open('jsonl', tmp_path)
+    handler.update_date_records([_record(1)])
+    rollups = handler.get_rollups()
+    persisted_version = rollups._load_persisted()
+
+    for day in range(2, 6):
+        handler.update_date_records([_record(day)])
+    # Updated in memory, not rewritten on disk yet
+    assert rollups.version == handler.get_version()
+    with open(rollups.path, encoding='utf-8') as f:
+        assert persisted_version in f.read()
+
+    handler.close()
+    reopened = _open('jsonl', tmp_path)
+    assert reopened.rollups._load_persisted() == reopened.get_version()
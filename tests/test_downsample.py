@@ -0,0 +1,41 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.downsample import lttb_indices  # noqa: E402
+
+
+@pytest.mark.parametrize('n, threshold', [(10, 10), (10, 50), (10, 2), (10, 0)])
+def test_short_series_are_kept_whole(n, threshold):
+    x = np.arange(n)
+    assert lttb_indices(x, x * 2, threshold).tolist() == list(range(n))
+
+
+@pytest.mark.parametrize('n, threshold', [(100, 3), (100, 10), (1000, 97), (1001, 1000)])
+def test_indices_keep_endpoints_and_increase(n, threshold):
+    rng = np.random.default_rng(0)
+    indices = lttb_indices(np.arange(n), rng.random(n), threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_peaks_survive():
+    y = np.zeros(1000)
+    y[321] = 50
+    y[777] = -50
+    indices = lttb_indices(np.arange(1000), y, 20)
+    assert 321 in indices and 777 in indices
+
+
+def test_datetime_x():
+    x = np.arange('2020-01-01', '2023-01-01', dtype='datetime64[D]').astype('datetime64[s]')
+    y = np.sin(np.arange(len(x)) / 30)
+    indices = lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.validation import (  # noqa: E402
+    ProblemId, extract_alcumus_timestamps, iter_alcumus_timestamps, parse_problem_number, validate_batch
+)
+
+
+def _parsed(item: str) -> ProblemId:
+    parsed = parse_problem_number(item)
+    assert parsed is not None
+    return parsed
+
+
+def test_problem_numbers_parse_and_order():
+    assert _parsed('15.1') == ProblemId(15, 1)
+    assert _parsed(' 15.1.5 ') == ProblemId(15, 1, 5)
+    assert parse_problem_number('15') is None
+    assert parse_problem_number('15.a') is None
+    # A section's Problem comes before its Exercises, numbers compare as ints
+    items = ['15.10', '15.2.1', '15.2', '16.1', '15.9']
+    assert [str(p) for p in sorted(map(_parsed, items))] == ['15.2', '15.2.1', '15.9', '15.10', '16.1']
+    assert _parsed('15.2') < _parsed('15.2.1') <= _parsed('15.2.1') < _parsed('15.3')
+    assert _parsed('15.3') > _parsed('15.2.9') >= _parsed('15.2.9')
+
+
+@pytest.mark.parametrize('previous, item, expected', [
+    ('15.1', '15.2', True),
+    ('15.9', '16.1', True),
+    ('15.1', '15.3', False),
+    ('15.9', '16.2', False),
+    ('15.9', '17.1', False),
+    ('15.1.1', '15.1.2', True),
+    ('15.1.4', '15.2.1', True),
+    ('15.3.2', '16.1.1', True),
+    ('15.1.4', '15.2.2', False),
+    ('15.1.4', '15.3.1', False),
+    ('15.1', '15.1.1', False),
+    ('15.1.1', '15.2', False),
+])
+def test_is_successor_of(previous, item, expected):
+    assert _parsed(item).is_successor_of(_parsed(previous)) is expected
+
+
+def _day(date_str: str, *items: str) -> dict:
+    return {'date': date_str, 'problems': [i for i in items if i.count('.') == 1],
+            'exercises': [i for i in items if i.count('.') == 2]}
+
+
+def test_batch_is_checked_against_the_record_before_it():
+    stored = [_day('2024-01-01', '1.1', '1.2')]
+    assert validate_batch([_day('2024-01-02', '1.3')], stored) == []
+    errors = validate_batch([_day('2024-01-02', '1.5')], stored)
+    assert [date for date, _ in errors] == ['2024-01-02']
+
+
+def test_batch_is_checked_against_saved_days_between_and_after_it():
+    stored = [_day('2024-01-01', '1.1'), _day('2024-01-03', '1.5'), _day('2024-01-06', '1.9')]
+    days = [_day('2024-01-02', '1.2'), _day('2024-01-05', '1.6')]
+    errors = validate_batch(days, stored)
+    # 01-03 no longer follows 01-02; 01-05 follows 01-03; 01-06 no longer follows 01-05
+    assert [date for date, _ in errors] == ['2024-01-03', '2024-01-06']
+    assert errors[0][1].startswith('已保存记录的Problem')
+
+    days = [_day('2024-01-02', '1.2', '1.3', '1.4'), _day('2024-01-05', '1.6', '1.7', '1.8')]
+    assert validate_batch(days, stored) == []
+
+
+def test_batch_day_replaces_the_saved_record_of_its_date():
+    stored = [_day('2024-01-01', '1.1'), _day('2024-01-02', '3.1'), _day('2024-01-03', '1.3')]
+    assert validate_batch([_day('2024-01-02', '1.2')], stored) == []
+
+
+PASTE = ("Solved 2025-09-01 12:45:52 Algebra\n2025-09-01 12:47:03 (again)"
+         "2025-09-01 12:50:00\n2025-09-02 08:00:00 x 2025-13-01 1:00:00 end 2025-09-02 08:01:")
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 5, 18, 19, 20, 37, 1000])
+def test_streamed_timestamps_match_across_chunk_boundaries(chunk_size):
+    chunks = [PASTE[i:i + chunk_size] for i in range(0, len(PASTE), chunk_size)]
+    expected = extract_alcumus_timestamps(PASTE)
+    assert len(expected) == 4
+    assert list(iter_alcumus_timestamps(chunks)) == expected
+
+
+def test_streamed_timestamps_split_at_every_position():
+    text = 'a 2025-09-01 12:45:52 b 2025-09-01 12:47:03'
+    for split in range(len(text) + 1):
+        assert list(iter_alcumus_timestamps([text[:split], '', text[split:]])) == \
+            ['2025-09-01 12:45:52', '2025-09-01 12:47:03']
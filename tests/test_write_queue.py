@@ -0,0 +1,90 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_handler import ConflictError, DataHandler, create_data_handler  # noqa: E402
+from utils.write_queue import BackgroundWriter  # noqa: E402
+
+
+def _record(notes: str) -> dict:
+    return {'date': '2024-01-01', 'problems': ['1.1'], 'exercises': [], 'alcumus': [],
+            'notes': notes, 'book': 'Introduction to Algebra'}
+
+
+def test_coalesced_save_from_stale_version_conflicts(tmp_path):
+    handler = DataHandler(str(tmp_path / 'progress.jsonl'), str(tmp_path / 'backups'))
+    handler.update_date_records([_record('original')])
+    v0 = handler.get_record_version('2024-01-01')
+
+    writer = BackgroundWriter(handler)
+    try:
+        # Hold the worker so both saves wait in the queue together
+        with handler._lock:
+            first = writer.submit(_record('session A'), v0)
+            second = writer.submit(_record('session B'), v0)
+            with pytest.raises(ConflictError):
+                second.result(timeout=5)
+        first.result(timeout=5)
+        assert writer.flush(timeout=5)
+    finally:
+        writer.close()
+    assert handler.get_data_by_date('2024-01-01')['notes'] == 'session A'
+
+
+def test_save_on_top_of_queued_record_is_coalesced(tmp_path):
+    handler = DataHandler(str(tmp_path / 'progress.jsonl'), str(tmp_path / 'backups'))
+    handler.update_date_records([_record('original')])
+    v0 = handler.get_record_version('2024-01-01')
+
+    writer = BackgroundWriter(handler)
+    try:
+        with handler._lock:
+            first = writer.submit(_record('first edit'), v0)
+            # The same session saves again after reading its queued record
+            second = writer.submit(_record('second edit'), writer.get_record_version('2024-01-01'))
+        first.result(timeout=5)
+        second.result(timeout=5)
+    finally:
+        writer.close()
+    assert handler.get_data_by_date('2024-01-01')['notes'] == 'second edit'
+
+
+@pytest.mark.parametrize('backend', ['jsonl', 'sqlite'])
+def test_background_saves_alongside_page_reads(backend, tmp_path):
+    if backend == 'sqlite':
+        handler = create_data_handler('sqlite', db_file=str(tmp_path / 'progress.db'), durability='none')
+    else:
+        handler = create_data_handler('jsonl', data_file=str(tmp_path / 'progress.jsonl'),
+                                      backup_dir=str(tmp_path / 'backups'), durability='none')
+    writer = BackgroundWriter(handler)
+    stop = threading.Event()
+
+    def read_pages():
+        # What the overview and details pages read while saves are written
+        while not stop.is_set():
+            handler.get_rollups()
+            handler.get_achievements()
+            handler.get_continuity_issues()
+            handler.get_columns()
+
+    readers = [threading.Thread(target=read_pages, daemon=True) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    try:
+        futures = [writer.submit(dict(_record(f'day {day}'), date=f'2024-02-{day:02d}'))
+                   for day in range(1, 29)]
+        for future in futures:
+            future.result(timeout=30)
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join(30)
+        writer.close()
+    assert not any(reader.is_alive() for reader in readers)
+    assert len(handler.load_all_data()) == 28
+    handler.close()
@@ -0,0 +1,139 @@
+from typing import List, Dict, Any, Optional, Set
+
+from utils.derived import JSONDerivedStore, Change
+from utils.validation import parse_problem_number
+
+MILESTONE_STEP = 100
+
+
+def _count(record: Dict[str, Any]) -> int:
+    return (len(record.get('problems', [])) + len(record.get('exercises', []))
+            + len(record.get('alcumus', [])))
+
+
+def _chapters(record: Optional[Dict[str, Any]]) -> Set[int]:
+    chapters = set()
+    if not record:
+        return chapters
+    # Alcumus timestamps never parse as problem numbers
+    for item in record.get('problems', []) + record.get('exercises', []):
+        parsed = parse_problem_number(item)
+        if parsed:
+            chapters.add(parsed.chapter)
+    return chapters
+
+
+class AchievementEngine(JSONDerivedStore):
+    """Chapter completions and milestones, maintained incrementally.
+
+    Persisted running state: the cumulative item count, the last date each
+    chapter was seen, the date each milestone was first reached, and the
+    contribution of the newest date. Saving the newest date (the normal
+    daily case) is applied in place; editing an older date falls back to a
+    full rebuild. `verify` compares the state against `get_achievements`.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._reset()
+
+    def _reset(self):
+        self.cumulative_count = 0
+        self.chapter_last_dates: Dict[int, str] = {}
+        self.milestone_dates: Dict[int, str] = {}
+        self.last_date: Optional[str] = None
+        self.last_count = 0
+        self.last_chapters: Set[int] = set()
+
+    def _add_day(self, date: str, record: Dict[str, Any], chapters: Set[int]):
+        """Account for the record of a date later than every date seen so far."""
+        count = _count(record)
+        self.cumulative_count += count
+        for chapter in chapters:
+            self.chapter_last_dates[chapter] = date
+
+        milestone = (self.cumulative_count // MILESTONE_STEP) * MILESTONE_STEP
+        if milestone >= MILESTONE_STEP and milestone not in self.milestone_dates:
+            self.milestone_dates[milestone] = date
+
+        self.last_date = date
+        self.last_count = count
+        self.last_chapters = chapters
+
+    def rebuild(self, records: List[Dict[str, Any]]):
+        self._reset()
+        for record in sorted(records, key=lambda x: x['date']):
+            self._add_day(record['date'], record, _chapters(record))
+
+    def apply_changes(self, changes: List[Change]) -> bool:
+        for date, _, after in changes:
+            if not after:
+                return False
+            if self.last_date is None or date > self.last_date:
+                self._add_day(date, after, _chapters(after))
+            elif date == self.last_date:
+                # Re-saving the newest date: undo its previous contribution.
+                # A chapter that disappears from it would need its previous
+                # last date, which is not kept, so rebuild in that case.
+                chapters = _chapters(after)
+                if not self.last_chapters <= chapters:
+                    return False
+                self.cumulative_count -= self.last_count
+                self.milestone_dates = {m: d for m, d in self.milestone_dates.items() if d != date}
+                self._add_day(date, after, chapters)
+            else:
+                return False
+        return True
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            'cumulative_count': self.cumulative_count,
+            'chapter_last_dates': {str(c): d for c, d in self.chapter_last_dates.items()},
+            'milestone_dates': {str(m): d for m, d in self.milestone_dates.items()},
+            'last_date': self.last_date,
+            'last_count': self.last_count,
+            'last_chapters': sorted(self.last_chapters)
+        }
+
+    def from_state(self, state: Dict[str, Any]):
+        chapter_last_dates = {int(c): d for c, d in state['chapter_last_dates'].items()}
+        milestone_dates = {int(m): d for m, d in state['milestone_dates'].items()}
+        self.cumulative_count = state['cumulative_count']
+        self.chapter_last_dates = chapter_last_dates
+        self.milestone_dates = milestone_dates
+        self.last_date = state['last_date']
+        self.last_count = state['last_count']
+        self.last_chapters = set(state['last_chapters'])
+
+    def achievements(self) -> List[Dict[str, Any]]:
+        """Achievements in the same format and order as charts.get_achievements."""
+        with self._lock:
+            achievements = []
+
+            # A chapter is complete once the next chapter has been started
+            for chapter, date in sorted(self.chapter_last_dates.items()):
+                if chapter + 1 in self.chapter_last_dates:
+                    achievements.append({
+                        'type': 'chapter_completion',
+                        'description': f'📚 第{chapter}章完成！',
+                        'date': date,
+                        'chapter': chapter
+                    })
+
+            for milestone, date in sorted(self.milestone_dates.items()):
+                achievements.append({
+                    'type': 'milestone',
+                    'description': f'🎯 完成{milestone}道题目！',
+                    'date': date,
+                    'milestone': milestone
+                })
+
+        achievements.sort(key=lambda x: (x['date'], x['type']), reverse=True)
+        return achievements
+
+    def verify(self, handler) -> bool:
+        """Check the incremental state against a full recomputation."""
+        from utils.charts import get_achievements
+
+        self.refresh(handler)
+        return self.achievements() == get_achievements(handler.load_all_data())
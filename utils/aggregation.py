@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any
+
+COUNT_COLUMNS = ['problems', 'exercises', 'alcumus', 'total']
+
+
+class ChartAggregates:
+    """Daily, weekly and monthly count tables built from one parse of the records.
+
+    `daily` has one row per record (`date` column); `weekly` is keyed by the
+    week-ending date (`week`) and `monthly` by the first day of the month
+    (`month`). All count columns are int32.
+    """
+
+    def __init__(self, daily: pd.DataFrame, weekly: pd.DataFrame, monthly: pd.DataFrame):
+        self.daily = daily
+        self.weekly = weekly
+        self.monthly = monthly
+
+    @property
+    def empty(self) -> bool:
+        return self.daily.empty
+
+
+def build_daily_frame(all_data: List[Dict[str, Any]]) -> pd.DataFrame:
+    """One row per record: datetime64 `date` plus int32 counts."""
+    n = len(all_data)
+    problems = np.fromiter((len(r.get('problems', [])) for r in all_data), dtype=np.int32, count=n)
+    exercises = np.fromiter((len(r.get('exercises', [])) for r in all_data), dtype=np.int32, count=n)
+    alcumus = np.fromiter((len(r.get('alcumus', [])) for r in all_data), dtype=np.int32, count=n)
+
+    return pd.DataFrame({
+        'date': pd.to_datetime([r['date'] for r in all_data], format='%Y-%m-%d'),
+        'problems': problems,
+        'exercises': exercises,
+        'alcumus': alcumus,
+        'total': problems + exercises + alcumus
+    })
+
+
+def build_daily_frame_from_columns(columns) -> pd.DataFrame:
+    """Same frame as build_daily_frame, straight from a DayColumns snapshot (no records parsed)."""
+    total = columns.problems + columns.exercises + columns.alcumus
+    return pd.DataFrame({
+        'date': pd.to_datetime(columns.dates()),
+        'problems': np.asarray(columns.problems, dtype=np.int32),
+        'exercises': np.asarray(columns.exercises, dtype=np.int32),
+        'alcumus': np.asarray(columns.alcumus, dtype=np.int32),
+        'total': total.astype(np.int32)
+    })
+
+
+def _rollup(daily: pd.DataFrame, keys: pd.Series, key_column: str) -> pd.DataFrame:
+    """Sum the daily counts per bucket key."""
+    return (daily[COUNT_COLUMNS]
+            .groupby(keys.rename(key_column), sort=True)
+            .sum()
+            .astype(np.int32)
+            .reset_index())
+
+
+def _frame_from_rollup_rows(rows: List[Dict[str, Any]], key_column: str) -> pd.DataFrame:
+    """Turn RollupStore rows ({'key', counts...}) into a chart frame."""
+    frame = pd.DataFrame({
+        key_column: pd.to_datetime([row['key'] for row in rows], format='%Y-%m-%d'),
+        **{column: np.array([row[column] for row in rows], dtype=np.int32)
+           for column in COUNT_COLUMNS}
+    })
+    if key_column == 'week':
+        # Same bucket label as the groupby path: the end of the Sunday's week
+        frame['week'] = frame['week'].dt.to_period('W').dt.end_time
+    return frame
+
+
+def build_aggregates(all_data: List[Dict[str, Any]], rollups=None, columns=None) -> ChartAggregates:
+    """Parse the records once and derive the day, week and month tables from it.
+
+    If `rollups` (a RollupStore) is given, the week and month tables are read
+    from its materialized totals instead of regrouping every day. If
+    `columns` (a DayColumns snapshot) is given, the day table is built from
+    it and `all_data` is not used.
+    """
+    if columns is not None:
+        daily = build_daily_frame_from_columns(columns)
+    else:
+        daily = build_daily_frame(all_data)
+
+    if rollups is not None:
+        weekly = _frame_from_rollup_rows(rollups.weekly_rows(), 'week')
+        monthly = _frame_from_rollup_rows(rollups.monthly_rows(), 'month')
+        return ChartAggregates(daily, weekly, monthly)
+
+    # Week buckets end on Sunday, month buckets start on the 1st
+    dates = daily['date']
+    weekly = _rollup(daily, dates.dt.to_period('W').dt.end_time, 'week')
+    monthly = _rollup(daily, dates.dt.to_period('M').dt.start_time, 'month')
+
+    return ChartAggregates(daily, weekly, monthly)
@@ -0,0 +1,286 @@
+import argparse
+import bisect
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from utils.derived import DerivedStore, Change
+from utils.validation import parse_problem_number
+
+AUDIT_KINDS = ('problems', 'exercises')
+KIND_LABELS = {'problems': 'Problem', 'exercises': 'Exercise'}
+
+# A run of consecutive items: (start position, end position, date)
+Interval = Tuple[int, int, str]
+
+# One numbered sequence: (book, kind). Numbering restarts with every book, so
+# items are only compared with items of the same book.
+Stream = Tuple[str, str]
+
+
+def _position(item: str) -> Optional[int]:
+    """Integer key ordering items like ProblemId (a section's Problem before its Exercises)."""
+    parsed = parse_problem_number(item)
+    if parsed is None:
+        return None
+    chapter, section, exercise = parsed
+    return (chapter << 40) | (section << 20) | (0 if exercise is None else exercise + 1)
+
+
+def _runs(items: List[str]) -> List[Tuple[int, int]]:
+    """Split a day's items into runs of consecutive items (see is_successor_of)."""
+    runs = []
+    previous = None
+    for item in items:
+        parsed = parse_problem_number(item)
+        if parsed is None:
+            previous = None
+            continue
+        position = _position(item)
+        if previous is not None and parsed.is_successor_of(previous):
+            runs[-1][1] = position
+        else:
+            runs.append([position, position])
+        previous = parsed
+    return [(start, end) for start, end in runs]
+
+
+class ContinuityAudit(DerivedStore):
+    """Gaps, overlaps and duplicates across the whole history.
+
+    Every day's Problems and Exercises are split into runs of consecutive
+    items, kept in an interval index sorted by start position, one index per
+    book and kind. An issue is attributed to the later of the two dates
+    involved:
+
+    - gap: the next item (same day, or the first item of the next day with
+      items of that kind in the same book) skips ahead
+    - overlap: a run covers a range already covered by an earlier date (or
+      another run of the same day), or the next item goes backwards
+    - duplicate: the same item was recorded on an earlier date or twice
+      on one day
+
+    A full audit costs O(n log n). After a save only the edited dates, the
+    next day of each kind and the dates overlapping the edited runs are
+    re-checked. The index is kept in memory (path=None).
+    """
+
+    def __init__(self):
+        super().__init__(None)
+        self._reset()
+
+    def _reset(self):
+        self.books: Dict[str, str] = {}  # date -> book of its record
+        self.days: Dict[Stream, Dict[str, List[str]]] = {}
+        self.dates: Dict[Stream, List[str]] = {}
+        self.intervals: Dict[Stream, List[Interval]] = {}
+        self.max_span: Dict[Stream, int] = {}
+        self.item_dates: Dict[Stream, Dict[str, List[str]]] = {}
+        self._issues: Dict[str, List[Dict[str, Any]]] = {}
+        self._referenced_by: Dict[str, Set[str]] = {}
+
+    # Index maintenance
+
+    def _streams(self, date_str: str) -> List[Stream]:
+        """The (book, kind) sequences the record of date_str belongs to."""
+        book = self.books.get(date_str)
+        return [] if book is None else [(book, kind) for kind in AUDIT_KINDS]
+
+    def _add_record(self, record: Dict[str, Any]):
+        date_str = record['date']
+        self.books[date_str] = record.get('book', '')
+        for stream in self._streams(date_str):
+            self._add_day(stream, date_str, record.get(stream[1], []))
+
+    def _remove_record(self, date_str: str):
+        for stream in self._streams(date_str):
+            self._remove_day(stream, date_str)
+        self.books.pop(date_str, None)
+
+    def _add_day(self, stream: Stream, date_str: str, items: List[str]):
+        if not items:
+            return
+        self.days.setdefault(stream, {})[date_str] = items
+        bisect.insort(self.dates.setdefault(stream, []), date_str)
+        intervals = self.intervals.setdefault(stream, [])
+        for start, end in _runs(items):
+            bisect.insort(intervals, (start, end, date_str))
+            self.max_span[stream] = max(self.max_span.get(stream, 0), end - start)
+        item_dates = self.item_dates.setdefault(stream, {})
+        for item in items:
+            bisect.insort(item_dates.setdefault(item, []), date_str)
+
+    def _remove_day(self, stream: Stream, date_str: str):
+        items = self.days.get(stream, {}).pop(date_str, None)
+        if not items:
+            return
+        dates = self.dates[stream]
+        del dates[bisect.bisect_left(dates, date_str)]
+        intervals = self.intervals[stream]
+        for start, end in _runs(items):
+            del intervals[bisect.bisect_left(intervals, (start, end, date_str))]
+        for item in items:
+            item_dates = self.item_dates[stream][item]
+            del item_dates[bisect.bisect_left(item_dates, date_str)]
+            if not item_dates:
+                del self.item_dates[stream][item]
+
+    def _overlapping(self, stream: Stream, start: int, end: int) -> List[Interval]:
+        """Intervals of the stream sharing any position with [start, end]."""
+        intervals = self.intervals.get(stream, [])
+        lo = bisect.bisect_left(intervals, (start - self.max_span.get(stream, 0),))
+        hi = bisect.bisect_right(intervals, (end, float('inf')))
+        return [interval for interval in intervals[lo:hi] if interval[1] >= start]
+
+    # Issue computation
+
+    def _compute_issues(self, date_str: str) -> List[Dict[str, Any]]:
+        issues = []
+        for stream in self._streams(date_str):
+            kind = stream[1]
+            items = self.days.get(stream, {}).get(date_str)
+            if not items:
+                continue
+            label = KIND_LABELS[kind]
+            dates = self.dates[stream]
+
+            # Exact repeats, grouped by the date they were first recorded
+            duplicates: Dict[str, List[str]] = {}
+            seen_today = set()
+            for item in items:
+                first_date = self.item_dates[stream][item][0]
+                if first_date < date_str:
+                    duplicates.setdefault(first_date, []).append(item)
+                elif item in seen_today:
+                    duplicates.setdefault(date_str, []).append(item)
+                seen_today.add(item)
+            for other_date, repeated in sorted(duplicates.items()):
+                shown = ', '.join(repeated[:5]) + (' ...' if len(repeated) > 5 else '')
+                where = '当天' if other_date == date_str else f" {other_date} "
+                issues.append(self._issue('duplicate', kind, date_str, other_date,
+                                          f"{label} {shown} 已在{where}记录过"))
+
+            # Runs covering ranges of earlier dates (beyond exact repeats)
+            overlaps = set()
+            for start, end in _runs(items):
+                for interval in self._overlapping(stream, start, end):
+                    other_date = interval[2]
+                    if (other_date <= date_str and other_date not in duplicates
+                            and interval != (start, end, date_str)):
+                        overlaps.add(other_date)
+            for other_date in sorted(overlaps):
+                where = '当天其他题目' if other_date == date_str else f" {other_date} 的记录"
+                issues.append(self._issue('overlap', kind, date_str, other_date,
+                                          f"{label} 与{where}重叠"))
+
+            # Sequence order: previous day's last item, then this day's items
+            pairs = [(items[i], items[i + 1], date_str) for i in range(len(items) - 1)]
+            pos = bisect.bisect_left(dates, date_str)
+            if pos > 0:
+                previous_date = dates[pos - 1]
+                pairs.insert(0, (self.days[stream][previous_date][-1], items[0], previous_date))
+            for before, after, other_date in pairs:
+                parsed_before, parsed_after = parse_problem_number(before), parse_problem_number(after)
+                if (not parsed_before or not parsed_after or before == after
+                        or parsed_after.is_successor_of(parsed_before)):
+                    continue
+                where = before if other_date == date_str else f"{other_date} 的 {before}"
+                if _position(after) > _position(before):
+                    issues.append(self._issue('gap', kind, date_str, other_date,
+                                              f"{label} 不连续: {where} 之后是 {after}"))
+                elif other_date not in overlaps and other_date not in duplicates:
+                    issues.append(self._issue('overlap', kind, date_str, other_date,
+                                              f"{label} 倒退: {where} 之后是 {after}"))
+        return issues
+
+    @staticmethod
+    def _issue(issue_type: str, kind: str, date_str: str, other_date: str,
+               description: str) -> Dict[str, Any]:
+        return {
+            'type': issue_type,
+            'kind': kind,
+            'date': date_str,
+            'other_date': other_date,
+            'description': description
+        }
+
+    def _recheck(self, date_str: str):
+        for issue in self._issues.pop(date_str, []):
+            if issue['other_date'] != date_str:
+                self._referenced_by.get(issue['other_date'], set()).discard(date_str)
+        issues = self._compute_issues(date_str)
+        if issues:
+            self._issues[date_str] = issues
+            for issue in issues:
+                if issue['other_date'] != date_str:
+                    self._referenced_by.setdefault(issue['other_date'], set()).add(date_str)
+
+    def _affected_dates(self, date_str: str) -> Set[str]:
+        """Dates whose issues may depend on the record of date_str."""
+        affected = {date_str} | self._referenced_by.get(date_str, set())
+        for stream in self._streams(date_str):
+            dates = self.dates.get(stream, [])
+            pos = bisect.bisect_right(dates, date_str)
+            if pos < len(dates):
+                affected.add(dates[pos])
+            items = self.days.get(stream, {}).get(date_str, [])
+            for start, end in _runs(items):
+                affected.update(other for _, _, other in self._overlapping(stream, start, end)
+                                if other > date_str)
+            for item in items:
+                affected.update(other for other in self.item_dates[stream][item] if other > date_str)
+        return affected
+
+    # DerivedStore interface
+
+    def rebuild(self, records: List[Dict[str, Any]]):
+        self._reset()
+        for record in records:
+            self._add_record(record)
+        for date_str in sorted(self.books):
+            self._recheck(date_str)
+
+    def apply_changes(self, changes: List[Change]) -> bool:
+        affected = set()
+        for date_str, _, after in changes:
+            # Dates that depended on the old record, then on the new one
+            affected |= self._affected_dates(date_str)
+            self._remove_record(date_str)
+            if after:
+                self._add_record(after)
+            affected |= self._affected_dates(date_str)
+        for date_str in sorted(affected):
+            self._recheck(date_str)
+        return True
+
+    def issues(self, date_str: str = None) -> List[Dict[str, Any]]:
+        """All issues sorted by date, or those involving date_str."""
+        with self._lock:
+            if date_str is None:
+                return [issue for date in sorted(self._issues) for issue in self._issues[date]]
+            related = [date_str] + sorted(self._referenced_by.get(date_str, set()))
+            return [issue for date in related for issue in self._issues.get(date, [])
+                    if date == date_str or issue['other_date'] == date_str]
+
+
+def audit_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Audit a full record list from scratch."""
+    audit = ContinuityAudit()
+    audit.rebuild(records)
+    return audit.issues()
+
+
+def main():
+    from utils.data_handler import create_data_handler
+
+    parser = argparse.ArgumentParser(description='Check the whole history for gaps, overlaps and duplicates')
+    parser.add_argument('--data-file', default='data/progress.jsonl')
+    args = parser.parse_args()
+
+    handler = create_data_handler('jsonl', data_file=args.data_file)
+    issues = audit_records(handler.load_all_data())
+    for issue in issues:
+        print(f"{issue['date']}  {issue['type']:<9}  {issue['description']}")
+    print(f"{len(issues)} issue(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+import argparse
+import json
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from utils.durability import GroupCommitter, check_durability, fsync_dir, fsync_file
+
+SNAPSHOT_PREFIX = 'progress_snapshot_'
+DELTA_PREFIX = 'progress_deltas_'
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S_%f'
+
+_SNAPSHOT_NAME = re.compile(
+    r'^(?:progress_snapshot_(\d{8}_\d{6}_\d{6})|progress_backup_(\d{8}_\d{6}))\.jsonl$'
+)
+
+
+def _parse_snapshot_name(filename: str) -> Optional[datetime]:
+    """Return the timestamp encoded in a snapshot (or legacy backup) filename."""
+    match = _SNAPSHOT_NAME.match(filename)
+    if not match:
+        return None
+    if match.group(1):
+        return datetime.strptime(match.group(1), TIMESTAMP_FORMAT)
+    return datetime.strptime(match.group(2), '%Y%m%d_%H%M%S')
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Read a JSONL file, stopping at the first torn or invalid line."""
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _read_jsonl_strict(path: str) -> Optional[List[Dict[str, Any]]]:
+    """Read a JSONL file; None if any line is unreadable (e.g. a torn snapshot)."""
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    return records
+
+
+class BackupStore:
+    """Periodic full snapshots plus a per-save delta log.
+
+    Each snapshot `progress_snapshot_<ts>.jsonl` has a companion
+    `progress_deltas_<ts>.jsonl` holding one line per saved change
+    (`{"ts", "date", "before", "after"}`). A save appends one delta line;
+    a new snapshot is taken every `snapshot_interval` deltas and only the
+    newest `max_snapshots` snapshots (with their deltas) are kept.
+    Legacy `progress_backup_*.jsonl` full copies are treated as snapshots
+    without deltas.
+
+    The delta log doubles as the journal for crash recovery (see
+    recover_records). Snapshots are fsynced at every durability level but
+    'none'; with 'group' durability delta lines are fsynced in groups.
+    """
+
+    def __init__(self, backup_dir='data/backups', max_snapshots=10, snapshot_interval=50,
+                 durability='none'):
+        self.backup_dir = backup_dir
+        self.max_snapshots = max_snapshots
+        self.snapshot_interval = snapshot_interval
+        self.durability = check_durability(durability)
+        self.committer = GroupCommitter() if durability == 'group' else None
+        os.makedirs(backup_dir, exist_ok=True)
+
+        # Loaded lazily from the directory and kept in memory until the
+        # directory changes (e.g. another process took a snapshot)
+        self._snapshots: Optional[List[Tuple[datetime, str]]] = None
+        self._dir_mtime = None
+        self._delta_count = 0
+
+    def _load_state(self):
+        """List existing snapshots and count the current delta log if the directory changed."""
+        dir_mtime = os.stat(self.backup_dir).st_mtime_ns
+        if self._snapshots is not None and dir_mtime == self._dir_mtime:
+            return
+        self._dir_mtime = dir_mtime
+        snapshots = []
+        for filename in os.listdir(self.backup_dir):
+            ts = _parse_snapshot_name(filename)
+            if ts is not None:
+                snapshots.append((ts, filename))
+        snapshots.sort()
+        self._snapshots = snapshots
+
+        current = self._current_delta_path()
+        self._delta_count = len(_read_jsonl(current)) if current else 0
+
+    def _delta_path(self, snapshot_filename: str) -> Optional[str]:
+        """Delta log belonging to a snapshot (None for legacy full copies)."""
+        if not snapshot_filename.startswith(SNAPSHOT_PREFIX):
+            return None
+        return os.path.join(self.backup_dir,
+                            DELTA_PREFIX + snapshot_filename[len(SNAPSHOT_PREFIX):])
+
+    def _current_delta_path(self) -> Optional[str]:
+        """Delta log following the newest snapshot."""
+        if not self._snapshots:
+            return None
+        return self._delta_path(self._snapshots[-1][1])
+
+    def _now(self) -> datetime:
+        """Current time, strictly after the newest snapshot so names never collide."""
+        now = datetime.now()
+        if self._snapshots and now <= self._snapshots[-1][0]:
+            now = self._snapshots[-1][0] + timedelta(microseconds=1)
+        return now
+
+    def snapshot(self, records: List[Dict[str, Any]]):
+        """Write a full snapshot of `records` and start a new delta log."""
+        self._load_state()
+        ts = self._now()
+        filename = f"{SNAPSHOT_PREFIX}{ts.strftime(TIMESTAMP_FORMAT)}.jsonl"
+
+        temp_file = None
+        try:
+            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8',
+                                             dir=self.backup_dir, delete=False) as f:
+                temp_file = f.name
+                for record in records:
+                    json.dump(record, f, ensure_ascii=False)
+                    f.write('\n')
+                if self.durability != 'none':
+                    fsync_file(f)
+            os.replace(temp_file, os.path.join(self.backup_dir, filename))
+            temp_file = None
+            if self.durability in ('dir', 'group'):
+                fsync_dir(self.backup_dir)
+        except Exception as e:
+            print(f"Warning: Failed to create backup: {e}")
+            if temp_file and os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                except OSError:
+                    pass
+            return
+
+        self._snapshots.append((ts, filename))
+        self._delta_count = 0
+        self._prune()
+
+    def ensure_snapshot(self, load_records: Callable[[], List[Dict[str, Any]]]):
+        """Take an initial snapshot if none exists yet (before the first change)."""
+        self._load_state()
+        if self._current_delta_path() is None:
+            self.snapshot(load_records())
+
+    def log_change(self, date_str: str, before: Optional[Dict[str, Any]],
+                   after: Optional[Dict[str, Any]],
+                   load_records: Callable[[], List[Dict[str, Any]]]):
+        """Append one delta line; roll over to a new snapshot when the log is full."""
+        self._load_state()
+        delta_path = self._current_delta_path()
+        if delta_path is None:
+            self.snapshot(load_records())
+            return
+
+        delta = {
+            'ts': datetime.now().isoformat(),
+            'date': date_str,
+            'before': before or None,
+            'after': after or None
+        }
+        try:
+            new_log = self.committer is not None and not os.path.exists(delta_path)
+            with open(delta_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(delta, ensure_ascii=False) + '\n')
+            self._delta_count += 1
+            if self.committer is not None:
+                if new_log:
+                    fsync_dir(self.backup_dir)
+                self.committer.written(delta_path)
+        except Exception as e:
+            print(f"Warning: Failed to create backup: {e}")
+            return
+
+        if self._delta_count >= self.snapshot_interval:
+            self.snapshot(load_records())
+
+    def _prune(self):
+        """Remove the oldest snapshots (and their delta logs) beyond max_snapshots."""
+        excess = len(self._snapshots) - self.max_snapshots
+        if excess <= 0:
+            return
+        for _, filename in self._snapshots[:excess]:
+            paths = [os.path.join(self.backup_dir, filename), self._delta_path(filename)]
+            for path in filter(None, paths):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"Warning: Failed to cleanup old backups: {e}")
+        self._snapshots = self._snapshots[excess:]
+
+    def list_restore_points(self) -> List[Tuple[datetime, str]]:
+        """All restorable points in time as (timestamp, description), oldest first."""
+        self._load_state()
+        points = []
+        for ts, filename in self._snapshots:
+            points.append((ts, f"snapshot {filename}"))
+            delta_path = self._delta_path(filename)
+            if delta_path:
+                for delta in _read_jsonl(delta_path):
+                    points.append((datetime.fromisoformat(delta['ts']), f"change {delta['date']}"))
+        return points
+
+    def restore_records(self, as_of: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Reconstruct the dataset as it was at `as_of` (default: latest backup).
+
+        Raises ValueError if no snapshot is older than `as_of`.
+        """
+        self._load_state()
+        candidates = [s for s in self._snapshots if as_of is None or s[0] <= as_of]
+        if not candidates:
+            raise ValueError("No backup snapshot exists before the requested time")
+        _, filename = candidates[-1]
+
+        records = {}
+        for record in _read_jsonl(os.path.join(self.backup_dir, filename)):
+            records[record['date']] = record
+
+        delta_path = self._delta_path(filename)
+        if delta_path:
+            for delta in _read_jsonl(delta_path):
+                if as_of is not None and datetime.fromisoformat(delta['ts']) > as_of:
+                    break
+                if delta['after'] is None:
+                    records.pop(delta['date'], None)
+                else:
+                    records[delta['date']] = delta['after']
+
+        return [records[date] for date in sorted(records)]
+
+    def close(self):
+        """Commit pending group fsyncs (see GroupCommitter)."""
+        if self.committer is not None:
+            self.committer.close()
+
+    def recover_records(self) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """The newest consistent state the backups can rebuild, and the last delta applied (if any).
+
+        Starts from the newest snapshot that reads back completely (a torn one
+        is skipped in favour of the one before) and replays every delta log
+        from there on, up to the first torn line. Raises ValueError if no
+        snapshot is readable.
+        """
+        self._load_state()
+        for start in range(len(self._snapshots) - 1, -1, -1):
+            ts, filename = self._snapshots[start]
+            base = _read_jsonl_strict(os.path.join(self.backup_dir, filename))
+            if base is None:
+                print(f"Warning: Skipping unreadable backup {filename}")
+                continue
+
+            records = {record['date']: record for record in base}
+            last_delta = None
+            for _, later in self._snapshots[start:]:
+                delta_path = self._delta_path(later)
+                if not delta_path:
+                    continue
+                for delta in _read_jsonl(delta_path):
+                    if delta['after'] is None:
+                        records.pop(delta['date'], None)
+                    else:
+                        records[delta['date']] = delta['after']
+                    last_delta = delta
+            return [records[date] for date in sorted(records)], last_delta
+        raise ValueError("No readable backup snapshot")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='List or restore progress backups.')
+    parser.add_argument('command', choices=['list', 'restore'])
+    parser.add_argument('--backup-dir', default='data/backups')
+    parser.add_argument('--as-of', help="Point in time, e.g. '2025-10-04 12:30:00' (default: latest)")
+    parser.add_argument('--output', default='data/progress.restored.jsonl',
+                        help='File to write the restored records to')
+    args = parser.parse_args()
+
+    store = BackupStore(args.backup_dir)
+    if args.command == 'list':
+        for ts, description in store.list_restore_points():
+            print(f"{ts.isoformat(sep=' ')}  {description}")
+    else:
+        as_of = datetime.fromisoformat(args.as_of) if args.as_of else None
+        restored = store.restore_records(as_of)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for record in restored:
+                json.dump(record, f, ensure_ascii=False)
+                f.write('\n')
+        print(f"Restored {len(restored)} records to {args.output}")
@@ -1,240 +1,117 @@
 import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+
+from utils.aggregation import ChartAggregates, build_aggregates, build_daily_frame
+from utils.downsample import lttb_indices
+from utils.instrumentation import timed
+
+# Above this many days the daily chart switches to WebGL traces downsampled
+# to this many points per trace
+DAILY_MAX_POINTS = 1000
 
 def prepare_chart_data(all_data: List[Dict[str, Any]]) -> pd.DataFrame:
     """Prepare data for chart visualization."""
-    chart_data = []
-    
-    for record in all_data:
-        date = record['date']
-        problems_count = len(record.get('problems', []))
-        exercises_count = len(record.get('exercises', []))
-        alcumus_count = len(record.get('alcumus', []))
-        total_count = problems_count + exercises_count + alcumus_count
-        
-        chart_data.append({
-            'date': datetime.strptime(date, '%Y-%m-%d'),
-            'problems': problems_count,
-            'exercises': exercises_count,
-            'alcumus': alcumus_count,
-            'total': total_count
-        })
-    
-    return pd.DataFrame(chart_data)
+    return build_daily_frame(all_data)
 
-def create_daily_chart(all_data: List[Dict[str, Any]]) -> go.Figure:
-    """Create daily aggregated chart."""
-    df = prepare_chart_data(all_data)
-    
-    if df.empty:
-        fig = go.Figure()
-        fig.add_annotation(
-            text="暂无数据",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False,
-            font=dict(size=20)
-        )
-        fig.update_layout(title="每日学习进度")
-        return fig
-    
+def _create_empty_chart(title: str) -> go.Figure:
+    """Placeholder figure shown when there is no data."""
     fig = go.Figure()
-    
-    # Add traces for each type
-    fig.add_trace(go.Scatter(
-        x=df['date'],
-        y=df['problems'],
-        mode='lines+markers',
-        name='Problem',
-        line=dict(color='#1f77b4', width=2),
-        marker=dict(size=6)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=df['date'],
-        y=df['exercises'],
-        mode='lines+markers',
-        name='Exercise',
-        line=dict(color='#ff7f0e', width=2),
-        marker=dict(size=6)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=df['date'],
-        y=df['alcumus'],
-        mode='lines+markers',
-        name='Alcumus',
-        line=dict(color='#9467bd', width=2),
-        marker=dict(size=6)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=df['date'],
-        y=df['total'],
-        mode='lines+markers',
-        name='总计',
-        line=dict(color='#2ca02c', width=2),
-        marker=dict(size=6)
-    ))
-    
-    fig.update_layout(
-        title="每日学习进度",
-        xaxis_title="日期",
-        yaxis_title="题目数量",
-        hovermode='x unified',
-        showlegend=True,
-        xaxis=dict(tickformat='%Y-%m-%d')
+    fig.add_annotation(
+        text="暂无数据",
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False,
+        font=dict(size=20)
     )
-    
+    fig.update_layout(title=title)
     return fig
 
-def create_weekly_chart(all_data: List[Dict[str, Any]]) -> go.Figure:
-    """Create weekly aggregated chart."""
-    df = prepare_chart_data(all_data)
-    
-    if df.empty:
-        fig = go.Figure()
-        fig.add_annotation(
-            text="暂无数据",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False,
-            font=dict(size=20)
-        )
-        fig.update_layout(title="每周学习进度")
-        return fig
-    
-    # Group by week and use week-ending date (Sunday)
-    df['week'] = df['date'].dt.to_period('W').dt.end_time
-    weekly_df = df.groupby('week').agg({
-        'problems': 'sum',
-        'exercises': 'sum',
-        'alcumus': 'sum',
-        'total': 'sum'
-    }).reset_index()
-    
+def _create_trend_chart(df: pd.DataFrame, x_column: str, title: str, xaxis_title: str,
+                        tickformat: str, marker_size: int, max_points: int = None) -> go.Figure:
+    """Line chart with one trace per count column.
+    
+    With more than `max_points` rows each trace is LTTB-downsampled to
+    `max_points` points and drawn with Scattergl (WebGL), and a range slider
+    is added, so the figure size stays bounded.
+    """
     fig = go.Figure()
+    downsample = max_points is not None and len(df) > max_points
+    scatter = go.Scattergl if downsample else go.Scatter
     
-    fig.add_trace(go.Scatter(
-        x=weekly_df['week'],
-        y=weekly_df['problems'],
-        mode='lines+markers',
-        name='Problem',
-        line=dict(color='#1f77b4', width=2),
-        marker=dict(size=8)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=weekly_df['week'],
-        y=weekly_df['exercises'],
-        mode='lines+markers',
-        name='Exercise',
-        line=dict(color='#ff7f0e', width=2),
-        marker=dict(size=8)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=weekly_df['week'],
-        y=weekly_df['alcumus'],
-        mode='lines+markers',
-        name='Alcumus',
-        line=dict(color='#9467bd', width=2),
-        marker=dict(size=8)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=weekly_df['week'],
-        y=weekly_df['total'],
-        mode='lines+markers',
-        name='总计',
-        line=dict(color='#2ca02c', width=2),
-        marker=dict(size=8)
-    ))
-    
+    # Add traces for each type
+    for column, name, color in [('problems', 'Problem', '#1f77b4'),
+                                ('exercises', 'Exercise', '#ff7f0e'),
+                                ('alcumus', 'Alcumus', '#9467bd'),
+                                ('total', '总计', '#2ca02c')]:
+        x, y = df[x_column], df[column]
+        if downsample:
+            kept = lttb_indices(x.to_numpy(), y.to_numpy(), max_points)
+            x, y = x.iloc[kept], y.iloc[kept]
+        fig.add_trace(scatter(
+            x=x,
+            y=y,
+            mode='lines+markers',
+            name=name,
+            line=dict(color=color, width=2),
+            marker=dict(size=marker_size if not downsample else 3)
+        ))
+    
+    xaxis = dict(tickformat=tickformat)
+    if downsample:
+        xaxis['rangeslider'] = dict(visible=True)
     fig.update_layout(
-        title="每周学习进度",
-        xaxis_title="周",
+        title=title,
+        xaxis_title=xaxis_title,
         yaxis_title="题目数量",
         hovermode='x unified',
         showlegend=True,
-        xaxis=dict(tickformat='%Y-%m-%d')
+        xaxis=xaxis
     )
     
     return fig
 
-def create_monthly_chart(all_data: List[Dict[str, Any]]) -> go.Figure:
+@timed()
+def create_daily_chart(all_data: List[Dict[str, Any]],
+                       aggregates: ChartAggregates = None,
+                       max_points: int = DAILY_MAX_POINTS,
+                       date_range: Tuple[Any, Any] = None) -> go.Figure:
+    """Create daily aggregated chart.
+    
+    Pass `aggregates` (from build_aggregates) to share one parse between charts.
+    Longer histories are downsampled to `max_points` (None disables it);
+    `date_range` (start, end) limits the chart to a window, which is then
+    drawn with the full point budget.
+    """
+    if aggregates is None:
+        aggregates = build_aggregates(all_data)
+    if aggregates.empty:
+        return _create_empty_chart("每日学习进度")
+    daily = aggregates.daily
+    if date_range is not None:
+        start, end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
+        daily = daily[(daily['date'] >= start) & (daily['date'] <= end)]
+    return _create_trend_chart(daily, 'date', "每日学习进度", "日期", '%Y-%m-%d', 6, max_points)
+
+@timed()
+def create_weekly_chart(all_data: List[Dict[str, Any]],
+                        aggregates: ChartAggregates = None) -> go.Figure:
+    """Create weekly aggregated chart (weeks end on Sunday)."""
+    if aggregates is None:
+        aggregates = build_aggregates(all_data)
+    if aggregates.empty:
+        return _create_empty_chart("每周学习进度")
+    return _create_trend_chart(aggregates.weekly, 'week', "每周学习进度", "周", '%Y-%m-%d', 8)
+
+@timed()
+def create_monthly_chart(all_data: List[Dict[str, Any]],
+                         aggregates: ChartAggregates = None) -> go.Figure:
     """Create monthly aggregated chart."""
-    df = prepare_chart_data(all_data)
-    
-    if df.empty:
-        fig = go.Figure()
-        fig.add_annotation(
-            text="暂无数据",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False,
-            font=dict(size=20)
-        )
-        fig.update_layout(title="每月学习进度")
-        return fig
-    
-    # Group by month
-    df['month'] = df['date'].dt.to_period('M').dt.start_time
-    monthly_df = df.groupby('month').agg({
-        'problems': 'sum',
-        'exercises': 'sum',
-        'alcumus': 'sum',
-        'total': 'sum'
-    }).reset_index()
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatter(
-        x=monthly_df['month'],
-        y=monthly_df['problems'],
-        mode='lines+markers',
-        name='Problem',
-        line=dict(color='#1f77b4', width=2),
-        marker=dict(size=10)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=monthly_df['month'],
-        y=monthly_df['exercises'],
-        mode='lines+markers',
-        name='Exercise',
-        line=dict(color='#ff7f0e', width=2),
-        marker=dict(size=10)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=monthly_df['month'],
-        y=monthly_df['alcumus'],
-        mode='lines+markers',
-        name='Alcumus',
-        line=dict(color='#9467bd', width=2),
-        marker=dict(size=10)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=monthly_df['month'],
-        y=monthly_df['total'],
-        mode='lines+markers',
-        name='总计',
-        line=dict(color='#2ca02c', width=2),
-        marker=dict(size=10)
-    ))
-    
-    fig.update_layout(
-        title="每月学习进度",
-        xaxis_title="月份",
-        yaxis_title="题目数量",
-        hovermode='x unified',
-        showlegend=True,
-        xaxis=dict(tickformat='%Y-%m')
-    )
-    
-    return fig
+    if aggregates is None:
+        aggregates = build_aggregates(all_data)
+    if aggregates.empty:
+        return _create_empty_chart("每月学习进度")
+    return _create_trend_chart(aggregates.monthly, 'month', "每月学习进度", "月份", '%Y-%m', 10)
 
 def get_weekly_summary(all_data: List[Dict[str, Any]]) -> Dict[str, int]:
     """Get current week's summary statistics."""
@@ -260,6 +137,7 @@ def get_weekly_summary(all_data: List[Dict[str, Any]]) -> Dict[str, int]:
     }
 
 
+@timed('charts.get_achievements')
 def get_achievements(all_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Get all achievements (chapter completions and milestones) sorted by completion date (newest first)."""
     if not all_data:
@@ -288,11 +166,11 @@ def get_achievements(all_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         cumulative_count += len(all_items)
         total_problems_by_date[date] = cumulative_count
         
-        # Track chapters seen on this date
-        for item in all_items:
+        # Track chapters seen on this date (Alcumus timestamps never parse)
+        for item in record.get('problems', []) + record.get('exercises', []):
             parsed = parse_problem_number(item)
             if parsed:
-                chapter_num = parsed[0]
+                chapter_num = parsed.chapter
                 chapter_last_dates[chapter_num] = date
     
     # Detect chapter completions
@@ -357,7 +235,7 @@ def detect_chapter_completion(all_data: List[Dict[str, Any]]) -> List[str]:
     for prob in all_problems + all_exercises:
         parsed = parse_problem_number(prob)
         if parsed:
-            chapters_seen.add(parsed[0])
+            chapters_seen.add(parsed.chapter)
     
     sorted_chapters = sorted(chapters_seen)
     for i in range(len(sorted_chapters) - 1):
@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any
+
+from utils.data_handler import create_data_handler
+
+DEFAULT_BOOK = "Introduction to Algebra"
+DEFAULT_CHILD_ID = 'default'
+
+_CHILD_ID = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class ChildRegistry:
+    """Index of children, each with its own storage shard.
+
+    The index is a small JSON file (`data/children.json`) listing
+    `{"id", "name", "book"}` per child; it is re-read only when it changes.
+    Every child's records live in their own shard under
+    `data/children/<id>/`, and a shard's handler is created the first time
+    that child is requested, so a request only touches the active child's
+    data. The 'default' child keeps using the original `data/progress.jsonl`.
+    At most `max_open_handlers` handlers (with their background writers) are
+    kept open; the least recently used one is closed beyond that. A closed
+    handler or writer still held by a session reopens on its next use.
+    """
+
+    def __init__(self, root='data', backend=None, max_open_handlers=64):
+        self.root = root
+        self.index_file = os.path.join(root, 'children.json')
+        self.backend = backend or os.environ.get('CHILD_PROGRESS_BACKEND', 'jsonl')
+        self.max_open_handlers = max_open_handlers
+
+        self._lock = threading.Lock()
+        self._children: Dict[str, Dict[str, Any]] = {}
+        self._index_mtime = None
+        self._handlers = OrderedDict()  # child_id -> handler, least recently used first
+        self._writers = {}  # child_id -> BackgroundWriter over that child's handler
+        self._recovered = set()  # shards checked by handler.recover() in this process
+
+        os.makedirs(root, exist_ok=True)
+
+    def _load_index(self):
+        """Re-read the index file if it changed since the last read."""
+        try:
+            mtime = os.stat(self.index_file).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._index_mtime and self._children:
+            return
+
+        children = []
+        if mtime is not None:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                children = json.load(f)
+        if not children:
+            children = [{'id': DEFAULT_CHILD_ID, 'name': '默认', 'book': DEFAULT_BOOK}]
+        self._children = {child['id']: child for child in children}
+        self._index_mtime = mtime
+
+    def list_children(self) -> List[Dict[str, Any]]:
+        """All registered children, in registration order."""
+        with self._lock:
+            self._load_index()
+            return list(self._children.values())
+
+    def get_child(self, child_id: str) -> Dict[str, Any]:
+        """Look up one child; raises KeyError if it is not registered."""
+        with self._lock:
+            self._load_index()
+            return self._children[child_id]
+
+    def add_child(self, child_id: str, name: str, book: str = DEFAULT_BOOK) -> Dict[str, Any]:
+        """Register a new child (or rename an existing one)."""
+        if not _CHILD_ID.match(child_id):
+            raise ValueError(f"Invalid child id: '{child_id}' (use letters, digits, '-' or '_')")
+        with self._lock:
+            self._load_index()
+            child = {'id': child_id, 'name': name, 'book': book}
+            children = dict(self._children)
+            children[child_id] = child
+
+            # Atomic write, same as the data file
+            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8',
+                                             dir=self.root, delete=False) as f:
+                json.dump(list(children.values()), f, ensure_ascii=False, indent=2)
+            os.replace(f.name, self.index_file)
+            self._children = children
+            self._index_mtime = os.stat(self.index_file).st_mtime_ns
+        return child
+
+    def shard_dir(self, child_id: str) -> str:
+        """Directory holding a child's data and backups."""
+        if child_id == DEFAULT_CHILD_ID:
+            return self.root
+        return os.path.join(self.root, 'children', child_id)
+
+    def _create_handler(self, child_id: str):
+        shard = self.shard_dir(child_id)
+        backup_dir = os.path.join(shard, 'backups')
+        if self.backend == 'sqlite':
+            handler = create_data_handler('sqlite', db_file=os.path.join(shard, 'progress.db'),
+                                          backup_dir=backup_dir)
+        else:
+            handler = create_data_handler(self.backend, data_file=os.path.join(shard, 'progress.jsonl'),
+                                          backup_dir=backup_dir)
+        # Repair a shard left damaged by a crash before its first use
+        if child_id not in self._recovered:
+            self._recovered.add(child_id)
+            message = handler.recover()
+            if message:
+                print(f"Warning: {message}")
+        return handler
+
+    def get_handler(self, child_id: str):
+        """Return the data handler for a child's shard, creating it on first use."""
+        with self._lock:
+            self._load_index()
+            if child_id not in self._children:
+                raise KeyError(child_id)
+            handler = self._handlers.get(child_id)
+            if handler is None:
+                handler = self._create_handler(child_id)
+                self._handlers[child_id] = handler
+                while len(self._handlers) > self.max_open_handlers:
+                    self._close_handler(*self._handlers.popitem(last=False))
+            else:
+                self._handlers.move_to_end(child_id)
+            return handler
+
+    def _close_handler(self, child_id: str, handler):
+        """Write the evicted shard's queued saves, then release its handler."""
+        writer = self._writers.pop(child_id, None)
+        if writer is not None:
+            writer.close()
+        handler.close()
+
+    def get_writer(self, child_id: str):
+        """Return the background writer for a child's shard (see BackgroundWriter)."""
+        from utils.write_queue import BackgroundWriter
+
+        handler = self.get_handler(child_id)
+        with self._lock:
+            writer = self._writers.get(child_id)
+            if writer is None:
+                writer = self._writers[child_id] = BackgroundWriter(handler)
+            return writer
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage the children hosted by this server.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list')
+    add_parser = subparsers.add_parser('add')
+    add_parser.add_argument('child_id')
+    add_parser.add_argument('name')
+    add_parser.add_argument('--book', default=DEFAULT_BOOK)
+    parser.add_argument('--root', default='data')
+    args = parser.parse_args()
+
+    registry = ChildRegistry(args.root)
+    if args.command == 'add':
+        registry.add_child(args.child_id, args.name, args.book)
+    for child in registry.list_children():
+        print(f"{child['id']}\t{child['name']}\t{child['book']}")
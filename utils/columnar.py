@@ -0,0 +1,203 @@
+import json
+import os
+import tempfile
+from datetime import date
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from utils.derived import DerivedStore, Change
+from utils.validation import parse_problem_number
+
+_MAGIC = b'CPCOLS1\n'
+_EPOCH = date(1970, 1, 1)
+_DTYPE = np.dtype('<i4')
+
+# One row per run of consecutive items: chapter, section (-1 for Problems),
+# first and last number (Problem section / Exercise number)
+RUN_FIELDS = 4
+
+
+def day_number(date_str: str) -> int:
+    """Days since 1970-01-01, the unit of numpy's datetime64[D]."""
+    return (date.fromisoformat(date_str) - _EPOCH).days
+
+
+def _item_runs(items: List[str]) -> List[List[int]]:
+    """Consecutive Problems/Exercises as [chapter, section, first, last] (unparsable items skipped)."""
+    runs: List[List[int]] = []
+    for item in items:
+        parsed = parse_problem_number(item)
+        if parsed is None:
+            continue
+        if parsed.exercise is None:
+            chapter, section, number = parsed.chapter, -1, parsed.section
+        else:
+            chapter, section, number = parsed
+        last = runs[-1] if runs else None
+        if last and last[0] == chapter and last[1] == section and last[3] + 1 == number:
+            last[3] = number
+        else:
+            runs.append([chapter, section, number, number])
+    return runs
+
+
+def _record_row(record: Dict[str, Any]):
+    """(day number, counts, runs) of one record."""
+    problems = record.get('problems', [])
+    exercises = record.get('exercises', [])
+    counts = [len(problems), len(exercises), len(record.get('alcumus', []))]
+    return day_number(record['date']), counts, _item_runs(problems) + _item_runs(exercises)
+
+
+def _runs_array(runs: List[List[int]]) -> np.ndarray:
+    return np.array(runs, dtype=_DTYPE).reshape(-1, RUN_FIELDS)
+
+
+class DayColumns:
+    """Per-day columns of a history, sorted by date.
+
+    `days` are int32 day numbers (view them as datetime64[D] with `dates()`),
+    `problems`/`exercises`/`alcumus` int32 counts. The item runs of day i are
+    `runs[run_offsets[i]:run_offsets[i + 1]]`. Arrays read from disk are
+    read-only memory maps.
+    """
+
+    def __init__(self, days: np.ndarray, problems: np.ndarray, exercises: np.ndarray,
+                 alcumus: np.ndarray, run_offsets: np.ndarray, runs: np.ndarray):
+        self.days = days
+        self.problems = problems
+        self.exercises = exercises
+        self.alcumus = alcumus
+        self.run_offsets = run_offsets
+        self.runs = runs
+
+    @classmethod
+    def empty(cls) -> 'DayColumns':
+        none = np.empty(0, dtype=_DTYPE)
+        return cls(none, none, none, none, np.zeros(1, dtype=_DTYPE), _runs_array([]))
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def dates(self) -> np.ndarray:
+        return self.days.astype('datetime64[D]')
+
+    def contains(self, date_str: str) -> bool:
+        day = day_number(date_str)
+        i = int(np.searchsorted(self.days, day))
+        return i < len(self.days) and self.days[i] == day
+
+    def chapters(self) -> List[int]:
+        """Chapters with at least one Problem or Exercise, ascending."""
+        return [int(chapter) for chapter in np.unique(self.runs[:, 0])]
+
+
+class ColumnarSnapshot(DerivedStore):
+    """Binary per-day columns of the data, rewritten after every save and memory-mapped.
+
+    Pages that only need dates, counts or chapters read `columns` instead of
+    load_all_data: the arrays are mapped from the file as they are, with no
+    JSON parsing and no per-record dicts. The file holds a small JSON header
+    (data version, row and run counts) followed by int32 arrays: days,
+    problems, exercises, alcumus, run_offsets and runs. It is replaced
+    atomically, so mapped readers keep a consistent (if older) copy.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.columns = DayColumns.empty()
+
+    def rebuild(self, records: List[Dict[str, Any]]):
+        rows = [_record_row(record) for record in records]
+        counts = np.array([row[1] for row in rows], dtype=_DTYPE).reshape(-1, 3)
+        run_counts = [len(row[2]) for row in rows]
+        self.columns = DayColumns(
+            np.array([row[0] for row in rows], dtype=_DTYPE),
+            counts[:, 0].copy(),
+            counts[:, 1].copy(),
+            counts[:, 2].copy(),
+            np.concatenate(([0], np.cumsum(run_counts, dtype=np.int64))).astype(_DTYPE),
+            _runs_array([run for row in rows for run in row[2]])
+        )
+
+    def apply_changes(self, changes: List[Change]) -> bool:
+        c = self.columns
+        days, problems, exercises, alcumus = c.days, c.problems, c.exercises, c.alcumus
+        offsets, runs = c.run_offsets, c.runs
+        for date_str, _, after in changes:
+            day = day_number(date_str)
+            i = int(np.searchsorted(days, day))
+            if i < len(days) and days[i] == day:
+                runs = np.delete(runs, np.s_[offsets[i]:offsets[i + 1]], axis=0)
+                run_counts = np.delete(np.diff(offsets), i)
+                days, problems, exercises, alcumus = (
+                    np.delete(column, i) for column in (days, problems, exercises, alcumus))
+            else:
+                run_counts = np.diff(offsets)
+            if after:
+                _, counts, new_runs = _record_row(after)
+                run_start = int(run_counts[:i].sum())
+                runs = np.insert(runs, run_start, _runs_array(new_runs), axis=0)
+                run_counts = np.insert(run_counts, i, len(new_runs))
+                days = np.insert(days, i, day)
+                problems = np.insert(problems, i, counts[0])
+                exercises = np.insert(exercises, i, counts[1])
+                alcumus = np.insert(alcumus, i, counts[2])
+            offsets = np.concatenate(([0], np.cumsum(run_counts, dtype=np.int64))).astype(_DTYPE)
+        self.columns = DayColumns(days.astype(_DTYPE), problems.astype(_DTYPE),
+                                  exercises.astype(_DTYPE), alcumus.astype(_DTYPE),
+                                  offsets, runs.astype(_DTYPE))
+        return True
+
+    def _persist(self):
+        """Write header + arrays to a temporary file, rename it, then map it."""
+        if self.path is None:
+            return
+        c = self.columns
+        header = json.dumps({'version': self.version, 'rows': len(c), 'runs': len(c.runs)}).encode('utf-8')
+        # Pad the header so the arrays start 8-byte aligned
+        header += b' ' * (-(len(_MAGIC) + 4 + len(header)) % 8)
+        directory = os.path.dirname(self.path) or '.'
+        with tempfile.NamedTemporaryFile(mode='wb', dir=directory, delete=False) as f:
+            f.write(_MAGIC)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            for column in (c.days, c.problems, c.exercises, c.alcumus, c.run_offsets, c.runs):
+                f.write(np.ascontiguousarray(column, dtype=_DTYPE).tobytes())
+        try:
+            os.replace(f.name, self.path)
+        except OSError as e:
+            # e.g. the old file is still mapped on Windows; keep the in-memory copy
+            print(f"Warning: Could not replace {os.path.basename(self.path)}: {e}")
+            os.remove(f.name)
+            return
+        self._map()
+
+    def _map(self) -> Optional[str]:
+        """Memory-map the file's arrays; returns its version."""
+        with open(self.path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{self.path} is not a columnar snapshot")
+            header_length = int.from_bytes(f.read(4), 'little')
+            header = json.loads(f.read(header_length))
+        rows, run_count = header['rows'], header['runs']
+        offset = len(_MAGIC) + 4 + header_length
+        data = np.memmap(self.path, dtype=_DTYPE, mode='r', offset=offset,
+                         shape=(5 * rows + 1 + RUN_FIELDS * run_count,))
+
+        bounds = np.cumsum([0, rows, rows, rows, rows, rows + 1])
+        days, problems, exercises, alcumus, run_offsets = (
+            data[start:end] for start, end in zip(bounds[:-1], bounds[1:]))
+        runs = data[bounds[-1]:].reshape(run_count, RUN_FIELDS)
+        self.columns = DayColumns(days, problems, exercises, alcumus, run_offsets, runs)
+        return header['version']
+
+    def _load_persisted(self) -> Optional[str]:
+        if self.path is None:
+            return None
+        try:
+            self.version = self._map()
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return self.version
@@ -0,0 +1,127 @@
+import re
+from typing import List, Dict, Any, Union
+
+from utils.validation import parse_problem_number
+
+ENCODING = 'runs'
+
+_TIMESTAMP = re.compile(r'^(\d{4}-\d{2}-\d{2}) (\d{2}):(\d{2}):(\d{2})$')
+
+# A run is either a literal item string or a list of ints:
+#   [chapter, start, end]            -> Problems chapter.start ... chapter.end
+#   [chapter, section, start, end]   -> Exercises chapter.section.start ... .end
+Run = Union[str, List[int]]
+
+
+def encode_items(items: List[str]) -> List[Run]:
+    """Collapse consecutive Problems/Exercises into ranges (lossless).
+
+    Items that would not print back identically (e.g. '15.01') and runs of a
+    single item are kept as literal strings.
+    """
+    runs: List[Run] = []
+    for item in items:
+        parsed = parse_problem_number(item)
+        if parsed is None or str(parsed) != item:
+            runs.append(item)
+            continue
+        chapter, section, exercise = parsed
+        last = runs[-1] if runs and isinstance(runs[-1], list) else None
+        if exercise is None:
+            if last and len(last) == 3 and last[0] == chapter and last[2] + 1 == section:
+                last[2] = section
+            else:
+                runs.append([chapter, section, section])
+        else:
+            if (last and len(last) == 4 and last[0] == chapter and last[1] == section
+                  and last[3] + 1 == exercise):
+                last[3] = exercise
+            else:
+                runs.append([chapter, section, exercise, exercise])
+
+    # Single-item ranges are shorter as plain strings
+    return [decode_runs([run])[0] if isinstance(run, list) and run[-1] == run[-2] else run
+            for run in runs]
+
+
+def decode_runs(runs: List[Run]) -> List[str]:
+    """Expand ranges produced by encode_items back into item strings."""
+    items = []
+    for run in runs:
+        if isinstance(run, str):
+            items.append(run)
+        elif len(run) == 3:
+            chapter, start, end = run
+            items.extend(f"{chapter}.{section}" for section in range(start, end + 1))
+        else:
+            chapter, section, start, end = run
+            items.extend(f"{chapter}.{section}.{exercise}" for exercise in range(start, end + 1))
+    return items
+
+
+def encode_timestamps(timestamps: List[str]) -> List[Union[str, list]]:
+    """Group Alcumus timestamps by day as [day, [seconds, delta, delta, ...]].
+
+    Seconds are since midnight, then deltas to the previous timestamp of the
+    group. Non-canonical strings are kept literally.
+    """
+    groups: List[Union[str, list]] = []
+    previous = None
+    for timestamp in timestamps:
+        match = _TIMESTAMP.match(timestamp)
+        if not match:
+            groups.append(timestamp)
+            previous = None
+            continue
+        day = match.group(1)
+        hours, minutes, seconds = (int(match.group(i)) for i in (2, 3, 4))
+        if hours > 23 or minutes > 59 or seconds > 59:
+            groups.append(timestamp)
+            previous = None
+            continue
+        value = hours * 3600 + minutes * 60 + seconds
+        if previous is not None and groups[-1][0] == day:
+            groups[-1][1].append(value - previous)
+        else:
+            groups.append([day, [value]])
+        previous = value
+    return groups
+
+
+def decode_timestamps(groups: List[Union[str, list]]) -> List[str]:
+    """Expand groups produced by encode_timestamps."""
+    timestamps = []
+    for group in groups:
+        if isinstance(group, str):
+            timestamps.append(group)
+            continue
+        day, offsets = group
+        value = 0
+        for i, offset in enumerate(offsets):
+            value = offset if i == 0 else value + offset
+            hours, rest = divmod(value, 3600)
+            minutes, seconds = divmod(rest, 60)
+            timestamps.append(f"{day} {hours:02d}:{minutes:02d}:{seconds:02d}")
+    return timestamps
+
+
+def compact_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Range-encoded copy of a record (marked with 'encoding': 'runs')."""
+    compact = dict(record)
+    compact['problems'] = encode_items(record.get('problems', []))
+    compact['exercises'] = encode_items(record.get('exercises', []))
+    compact['alcumus'] = encode_timestamps(record.get('alcumus', []))
+    compact['encoding'] = ENCODING
+    return compact
+
+
+def expand_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of compact_record; plain records are returned unchanged."""
+    if record.get('encoding') != ENCODING:
+        return record
+    expanded = dict(record)
+    del expanded['encoding']
+    expanded['problems'] = decode_runs(record.get('problems', []))
+    expanded['exercises'] = decode_runs(record.get('exercises', []))
+    expanded['alcumus'] = decode_timestamps(record.get('alcumus', []))
+    return expanded
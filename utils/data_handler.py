@@ -1,77 +1,385 @@
+import bisect
+import hashlib
 import json
 import os
 import shutil
+import warnings
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Iterable, TYPE_CHECKING
 import tempfile
 
+from utils.backup import BackupStore
+from utils.compact import compact_record, expand_record
+from utils.durability import DEFAULT_DURABILITY, check_durability, fsync_dir, fsync_file, fsync_path
+from utils.file_lock import FileLock
+from utils.instrumentation import timed
+from utils.validation import parse_problem_number
+from utils.achievements import AchievementEngine
+from utils.audit import ContinuityAudit
+from utils.rollups import RollupStore
+
+if TYPE_CHECKING:
+    from utils.columnar import DayColumns
+
+
+class ConflictError(Exception):
+    """Raised when a record changed since the caller last read it."""
+
+
+def record_version(record: Dict[str, Any]) -> str:
+    """Return an etag for a record ('' for a missing record)."""
+    if not record:
+        return ''
+    canonical = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
+
 class DataHandler:
-    def __init__(self, data_file='data/progress.jsonl', backup_dir='data/backups', max_backups=10):
+    def __init__(self, data_file='data/progress.jsonl', backup_dir='data/backups', max_backups=10,
+                 append_only=False, compact_threshold=200, snapshot_interval=50,
+                 compact_storage=False, durability='none'):
         self.data_file = data_file
         self.backup_dir = backup_dir
         self.max_backups = max_backups
         
+        # How far each save is flushed to disk (see utils.durability)
+        self.durability = check_durability(durability)
+        
+        # Full snapshots every snapshot_interval saves, one delta line per save
+        # in between; max_backups snapshots are kept. The delta log is also the
+        # journal recover() replays.
+        self.backups = BackupStore(backup_dir, max_snapshots=max_backups,
+                                   snapshot_interval=snapshot_interval,
+                                   durability=durability)
+        
+        # Append-only mode: updates append one superseding line (last write
+        # wins per date); the file is compacted once it holds more than
+        # compact_threshold superseded lines.
+        self.append_only = append_only
+        self.compact_threshold = compact_threshold
+        
+        # Compact storage: runs of consecutive items are written as ranges
+        # (see utils.compact). Encoded lines are always expanded on load, so
+        # the option can be switched on or off for an existing file.
+        self.compact_storage = compact_storage
+        
+        # In-memory index: date -> record, plus the sorted list of dates.
+        # Rebuilt only when the file signature (mtime/size/inode) changes.
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._sorted_dates: List[str] = []
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._line_count = 0
+        
+        # A damaged end of the file found by the last read, repaired by the
+        # next write: the torn last line, or b'' if only its newline is missing
+        self._torn_tail: Optional[bytes] = None
+        
+        # Secondary indexes (Alcumus timestamp -> date, chapter -> sorted
+        # dates), built lazily once per file signature
+        self._alcumus_dates: Dict[str, str] = {}
+        self._chapter_dates: Dict[int, List[str]] = {}
+        self._secondary_signature = None
+        
         # Ensure directories exist
         os.makedirs(os.path.dirname(data_file), exist_ok=True)
         os.makedirs(backup_dir, exist_ok=True)
+        
+        # Serializes read-modify-write across processes sharing the data file
+        self._lock = FileLock(data_file + '.lock')
+        
+        # Derived data kept in sync on every save (see utils.derived)
+        self.derived_stores = []
+        base = os.path.splitext(data_file)[0]
+        self.rollups = RollupStore(base + '.rollups.json')
+        self.add_derived_store(self.rollups)
+        self.achievements = AchievementEngine(base + '.achievements.json')
+        self.add_derived_store(self.achievements)
+        # Created by the first get_columns(), so pages that never read the
+        # columns do not import numpy
+        self.day_columns = None
+        self.audit = ContinuityAudit()
+        self.add_derived_store(self.audit)
     
-    def load_all_data(self) -> List[Dict[str, Any]]:
-        """Load all progress data from JSONL file."""
-        if not os.path.exists(self.data_file):
-            return []
+    @property
+    def lock(self):
+        """The re-entrant lock saves hold; derived stores take it before their own."""
+        return self._lock
+    
+    def add_derived_store(self, store):
+        """Register a DerivedStore to be updated after every save."""
+        self.derived_stores.append(store)
+    
+    def close(self):
+        """Persist derived stores and commit pending group fsyncs; the handler stays usable."""
+        for store in self.derived_stores:
+            store.close()
+        self.backups.close()
+    
+    def _notify(self, changes, previous_version: str):
+        """Update derived stores; changes=None means they must rebuild."""
+        for store in self.derived_stores:
+            if changes is None:
+                store.refresh(self)
+            else:
+                store.on_change(self, changes, previous_version)
+    
+    def get_rollups(self) -> RollupStore:
+        """Weekly/monthly totals, up to date with the current data."""
+        self.rollups.refresh(self)
+        return self.rollups
+    
+    @timed()
+    def get_achievements(self) -> List[Dict[str, Any]]:
+        """Chapter completions and milestones, newest first."""
+        self.achievements.refresh(self)
+        return self.achievements.achievements()
+    
+    def get_columns(self) -> 'DayColumns':
+        """Per-day dates, counts and item runs (memory-mapped), up to date with the current data."""
+        with self._lock:
+            if self.day_columns is None:
+                from utils.columnar import ColumnarSnapshot
+                
+                self.day_columns = ColumnarSnapshot(os.path.splitext(self.data_file)[0] + '.columns')
+                self.add_derived_store(self.day_columns)
+        self.day_columns.refresh(self)
+        return self.day_columns.columns
+    
+    @timed()
+    def get_continuity_issues(self, date_str: str = None) -> List[Dict[str, Any]]:
+        """Gaps, overlaps and duplicates in the whole history (or involving date_str)."""
+        self.audit.refresh(self)
+        return self.audit.issues(date_str)
+    
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Return (mtime_ns, size, inode) of the data file, or None if missing."""
+        try:
+            st = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    
+    def get_version(self) -> str:
+        """Opaque version of the data file; changes whenever the file is rewritten or appended to."""
+        signature = self._file_signature()
+        if signature is None:
+            return ''
+        return '-'.join(str(part) for part in signature)
+    
+    @timed()
+    def _read_file(self) -> List[Dict[str, Any]]:
+        """Parse every record in the JSONL file.
         
+        A torn last line (an append cut short by a crash) is skipped with a
+        warning; the file itself is left alone until the next write repairs
+        it (see _repair_tail) or recover() restores it. An unreadable line
+        anywhere else raises ValueError instead of leaving a partial index
+        that the next rewrite would save over the file.
+        """
         data = []
+        torn = None
+        line = b''
+        self._torn_tail = None
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
+            with open(self.data_file, 'rb') as f:
                 for line in f:
-                    line = line.strip()
-                    if line:
-                        data.append(json.loads(line))
-        except (json.JSONDecodeError, FileNotFoundError):
+                    if torn is not None:
+                        raise ValueError(f"Unreadable line in {self.data_file}: {torn[:80]!r}")
+                    if not line.strip():
+                        continue
+                    try:
+                        data.append(expand_record(json.loads(line)))
+                    except (ValueError, AttributeError):
+                        torn = line
+        except FileNotFoundError:
             return []
-        
+        if torn is not None:
+            warnings.warn(f"Skipping a torn last line in {self.data_file}: {torn[:80]!r}")
+            self._torn_tail = torn
+        elif line and not line.endswith(b'\n'):
+            # Complete record cut off before its newline; the next append must not join it
+            self._torn_tail = b''
         return data
     
+    def _keep_copy(self) -> str:
+        """Copy the data file aside before it is repaired; returns the copy's path."""
+        kept = f"{self.data_file}.before-recovery-{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        shutil.copy2(self.data_file, kept)
+        return kept
+    
+    def _repair_tail(self):
+        """Cut off the torn last line found by the last read, or end the last line.
+        
+        Called by writes under the lock, after the index is up to date, so the
+        file is the one that was read. The torn line is kept in a copy.
+        """
+        torn = self._torn_tail
+        if torn is None:
+            return
+        self._torn_tail = None
+        if torn:
+            kept = self._keep_copy()
+            warnings.warn(f"Cut a torn last line off {self.data_file} "
+                          f"(previous file kept as {os.path.basename(kept)})")
+            with open(self.data_file, 'r+b') as f:
+                f.truncate(os.fstat(f.fileno()).st_size - len(torn))
+        else:
+            with open(self.data_file, 'ab') as f:
+                f.write(b'\n')
+    
+    def _set_index(self, records: List[Dict[str, Any]]):
+        """Replace the in-memory index with the given records (last one wins per date)."""
+        index = {}
+        for record in records:
+            index[record['date']] = record
+        self._index = index
+        self._sorted_dates = sorted(index)
+        self._line_count = len(records)
+    
+    @property
+    def stale_line_count(self) -> int:
+        """Number of lines in the data file superseded by later lines."""
+        self._ensure_index()
+        return self._line_count - len(self._index)
+    
+    def _ensure_index(self):
+        """Re-parse the data file only if it changed since the last load."""
+        signature = self._file_signature()
+        if signature is not None and signature == self._signature:
+            return
+        # Re-parse under the lock so a concurrent append is never half-read
+        with self._lock:
+            signature = self._file_signature()
+            if signature is not None and signature == self._signature:
+                return
+            self._set_index(self._read_file() if signature is not None else [])
+            self._signature = signature
+    
+    @timed()
+    def load_all_data(self) -> List[Dict[str, Any]]:
+        """Load all progress data, sorted by date.
+        
+        Records are shared with the in-memory index and must not be mutated.
+        """
+        self._ensure_index()
+        return [self._index[date] for date in self._sorted_dates]
+    
     def get_data_by_date(self, date_str: str) -> Dict[str, Any]:
         """Get progress data for a specific date."""
-        all_data = self.load_all_data()
-        for record in all_data:
-            if record.get('date') == date_str:
-                return record
-        return {}
+        self._ensure_index()
+        return self._index.get(date_str, {})
     
-    def create_backup(self):
-        """Create a backup of the current data file."""
-        if not os.path.exists(self.data_file):
+    def get_record_version(self, date_str: str) -> str:
+        """Version (etag) of a date's record, for passing back to update_date_record."""
+        return record_version(self.get_data_by_date(date_str))
+    
+    def _ensure_secondary_indexes(self):
+        """Build the timestamp and chapter indexes for the current data."""
+        self._ensure_index()
+        if self._secondary_signature == self._signature:
             return
+        alcumus_dates = {}
+        chapter_dates = {}
+        for date_str in self._sorted_dates:
+            record = self._index[date_str]
+            for timestamp in record.get('alcumus', []):
+                alcumus_dates.setdefault(timestamp, date_str)
+            chapters = set()
+            for item in record.get('problems', []) + record.get('exercises', []):
+                parsed = parse_problem_number(item)
+                if parsed:
+                    chapters.add(parsed.chapter)
+            for chapter in chapters:
+                chapter_dates.setdefault(chapter, []).append(date_str)
+        self._alcumus_dates = alcumus_dates
+        self._chapter_dates = chapter_dates
+        self._secondary_signature = self._signature
+    
+    def get_alcumus_dates(self, timestamps: Iterable[str]) -> Dict[str, str]:
+        """Map each already stored timestamp among `timestamps` to its date."""
+        self._ensure_secondary_indexes()
+        alcumus_dates = self._alcumus_dates
+        return {t: alcumus_dates[t] for t in timestamps if t in alcumus_dates}
+    
+    def get_chapters(self) -> List[int]:
+        """Chapters that appear in any Problem or Exercise, ascending."""
+        self._ensure_secondary_indexes()
+        return sorted(self._chapter_dates)
+    
+    def get_date_range(self) -> Tuple[Optional[str], Optional[str]]:
+        """First and last recorded date (None, None if there is no data)."""
+        self._ensure_index()
+        if not self._sorted_dates:
+            return None, None
+        return self._sorted_dates[0], self._sorted_dates[-1]
+    
+    @timed()
+    def query_records(self, start_date: str = None, end_date: str = None,
+                      chapter: int = None, offset: int = 0, limit: int = None,
+                      newest_first: bool = True) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of records filtered by date range (inclusive) and chapter.
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"progress_backup_{timestamp}.jsonl"
-        backup_path = os.path.join(self.backup_dir, backup_filename)
+        Uses the sorted date index (and the chapter index), so the cost
+        depends on the page size, not on the length of the history.
         
-        try:
-            shutil.copy2(self.data_file, backup_path)
-            self._cleanup_old_backups()
-        except Exception as e:
-            print(f"Warning: Failed to create backup: {e}")
+        Returns:
+            (records of the page, total number of matching records)
+        """
+        if chapter is None:
+            self._ensure_index()
+            dates = self._sorted_dates
+        else:
+            self._ensure_secondary_indexes()
+            dates = self._chapter_dates.get(chapter, [])
+        
+        lo = bisect.bisect_left(dates, start_date) if start_date else 0
+        hi = bisect.bisect_right(dates, end_date) if end_date else len(dates)
+        total = max(0, hi - lo)
+        if newest_first:
+            stop = hi - offset
+            start = lo if limit is None else max(lo, stop - limit)
+            page = dates[start:max(start, stop)][::-1]
+        else:
+            start = lo + offset
+            stop = hi if limit is None else min(hi, start + limit)
+            page = dates[start:max(start, stop)]
+        return [self._index[date_str] for date_str in page], total
     
-    def _cleanup_old_backups(self):
-        """Remove old backup files, keeping only the most recent ones."""
-        try:
-            backup_files = [f for f in os.listdir(self.backup_dir) if f.startswith('progress_backup_')]
-            backup_files.sort(reverse=True)  # Most recent first
-            
-            # Remove excess backups
-            for backup_file in backup_files[self.max_backups:]:
-                backup_path = os.path.join(self.backup_dir, backup_file)
-                os.remove(backup_path)
-        except Exception as e:
-            print(f"Warning: Failed to cleanup old backups: {e}")
+    def create_backup(self):
+        """Take a full snapshot of the current data (starts a new delta log)."""
+        with self._lock:
+            self.backups.snapshot(self.load_all_data())
     
+    @timed()
     def save_data(self, all_data: List[Dict[str, Any]]):
-        """Save all data using atomic write with backup."""
-        # Create backup before writing
-        self.create_backup()
+        """Replace all data using atomic write, then snapshot the new state."""
+        with self._lock:
+            self.backups.ensure_snapshot(self.load_all_data)
+            self._write_file(all_data)
+            self.create_backup()
+            self._notify(None, '')
+    
+    def _serialize(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """On-disk form of a record."""
+        return compact_record(record) if self.compact_storage else record
+    
+    @timed()
+    def _write_file(self, all_data: List[Dict[str, Any]]):
+        """Atomically rewrite the data file with the given records."""
+        self._replace_file(all_data)
+        
+        # Refresh the index from memory instead of re-reading the file
+        self._set_index(all_data)
+        self._signature = self._file_signature()
+    
+    def _replace_file(self, records: Iterable[Dict[str, Any]]):
+        """Write records to a temporary file, then rename it over the data file.
+        
+        The records may be a generator; if it raises, the data file is untouched.
+        """
+        # The rewrite drops a torn last line; keep a copy of it first
+        if self._torn_tail:
+            self._keep_copy()
         
         # Use atomic write: write to temp file first, then rename
         temp_file = None
@@ -81,13 +389,18 @@ class DataHandler:
             with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', 
                                            dir=temp_dir, delete=False) as f:
                 temp_file = f.name
-                for record in all_data:
-                    json.dump(record, f, ensure_ascii=False)
+                for record in records:
+                    json.dump(self._serialize(record), f, ensure_ascii=False)
                     f.write('\n')
+                if self.durability in ('file', 'dir'):
+                    fsync_file(f)
             
             # Atomic rename
             shutil.move(temp_file, self.data_file)
             temp_file = None  # Successfully moved
+            self._torn_tail = None
+            if self.durability == 'dir':
+                fsync_dir(temp_dir)
             
         except Exception as e:
             # Cleanup temp file on error
@@ -98,59 +411,253 @@ class DataHandler:
                     pass
             raise e
     
+    @timed()
+    def _append_records(self, records: List[Dict[str, Any]]):
+        """Append superseding records to the data file in one write."""
+        self._repair_tail()
+        with open(self.data_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(self._serialize(record), ensure_ascii=False) + '\n'
+                            for record in records))
+            if self.durability in ('file', 'dir'):
+                fsync_file(f)
+        if self.backups.committer is not None:
+            self.backups.committer.written(self.data_file)
+        
+        for record in records:
+            date_str = record['date']
+            if date_str not in self._index:
+                bisect.insort(self._sorted_dates, date_str)
+            self._index[date_str] = record
+        self._line_count += len(records)
+        self._signature = self._file_signature()
+    
+    @timed()
+    def import_records(self, records: Iterable[Dict[str, Any]]):
+        """Merge many records into the data file in one atomic write.
+        
+        Records must come in date order, one per date; they replace stored
+        records with the same date. They are streamed into the new file next
+        to the stored ones instead of being collected first, and derived
+        stores are rebuilt afterwards. ValueError is raised (and nothing
+        written) for out-of-order input.
+        """
+        with self._lock:
+            self.backups.ensure_snapshot(self.load_all_data)
+            previous_version = self.get_version()
+            stored = self.load_all_data()
+            
+            def merged():
+                position = 0
+                last_date = None
+                for record in records:
+                    date_str = record['date']
+                    if last_date is not None and date_str <= last_date:
+                        raise ValueError(f"Records are not in date order: {date_str} after {last_date}")
+                    while position < len(stored) and stored[position]['date'] < date_str:
+                        yield stored[position]
+                        position += 1
+                    if position < len(stored) and stored[position]['date'] == date_str:
+                        position += 1
+                    yield record
+                    last_date = date_str
+                yield from stored[position:]
+            
+            self._replace_file(merged())
+            # The merged records were never held in memory; re-read on next access
+            self._signature = None
+            self._ensure_index()
+            self.create_backup()
+            self._notify(None, previous_version)
+    
+    def compact(self):
+        """Rewrite the data file sorted by date with one line per date."""
+        with self._lock:
+            previous_version = self.get_version()
+            self._write_file(self.load_all_data())
+            # Same records, new file version
+            self._notify([], previous_version)
+    
+    def _read_file_strict(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """Parse the data file line by line; (readable records, whether every line was readable)."""
+        records = []
+        valid = True
+        try:
+            with open(self.data_file, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = expand_record(json.loads(line))
+                    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+                        valid = False
+                        continue
+                    if isinstance(record, dict) and 'date' in record:
+                        records.append(record)
+                    else:
+                        valid = False
+        except FileNotFoundError:
+            pass
+        return records, valid
+    
+    def recover(self) -> Optional[str]:
+        """Check the data file at startup and restore it from the backups if it is damaged.
+        
+        The file is restored from the newest consistent backup state (newest
+        readable snapshot plus the delta journal) when a line is unreadable
+        (torn or zero-filled by a power loss), when it is empty while the
+        backups are not, or, with 'group' durability where the data file is
+        not synced, when it lacks the journal's last change and predates it. The old
+        file is kept as `<data file>.before-recovery-<timestamp>`; if no backup
+        is readable, the readable lines of a damaged file are kept instead.
+        Returns a description of what was done, or None if nothing was.
+        """
+        with self._lock:
+            if not os.path.exists(self.data_file):
+                return None
+            records, valid = self._read_file_strict()
+            try:
+                restored, last_delta = self.backups.recover_records()
+            except ValueError:
+                restored, last_delta = None, None
+            
+            if not valid:
+                reason = 'has unreadable lines'
+            elif not records and restored:
+                reason = 'is empty'
+            elif self.durability == 'group' and last_delta is not None:
+                # The data file is written before the journal: it is stale only
+                # if it lacks the last journaled change and predates it
+                current = {record['date']: record for record in records}
+                if current.get(last_delta['date']) == last_delta['after']:
+                    return None
+                modified = datetime.fromtimestamp(os.stat(self.data_file).st_mtime)
+                if modified >= datetime.fromisoformat(last_delta['ts']):
+                    return None
+                reason = 'is older than the backup journal'
+            else:
+                return None
+            
+            if restored is None:
+                restored = sorted({record['date']: record for record in records}.values(),
+                                  key=lambda record: record['date'])
+                source = 'its readable lines'
+            else:
+                source = 'the backups'
+            kept = self._keep_copy()
+            # Already copied; the rewrite needs no second copy
+            self._torn_tail = None
+            
+            # The restored file is written durably whatever the level
+            self._write_file(restored)
+            fsync_path(self.data_file)
+            fsync_dir(os.path.dirname(self.data_file))
+            self._notify(None, '')
+            return (f"{self.data_file} {reason}; restored {len(restored)} records from "
+                    f"{source} (previous file kept as {os.path.basename(kept)})")
+    
     def update_date_record(self, date_str: str, problems: List[str], 
                           exercises: List[str], notes: str, 
                           alcumus: List[str] = None, 
-                          book: str = "Introduction to Algebra"):
-        """Update or create a record for a specific date."""
+                          book: str = "Introduction to Algebra",
+                          expected_version: str = None):
+        """Update or create a record for a specific date.
+        
+        If expected_version is given (see get_record_version) and the stored
+        record no longer matches it, ConflictError is raised instead of
+        overwriting another session's change.
+        """
         if alcumus is None:
             alcumus = []
-        all_data = self.load_all_data()
-        
-        # Find existing record or create new one
-        record_found = False
-        for i, record in enumerate(all_data):
-            if record.get('date') == date_str:
-                all_data[i] = {
-                    'date': date_str,
-                    'problems': problems,
-                    'exercises': exercises,
-                    'alcumus': alcumus,
-                    'notes': notes,
-                    'book': book
-                }
-                record_found = True
-                break
-        
-        if not record_found:
-            all_data.append({
-                'date': date_str,
-                'problems': problems,
-                'exercises': exercises,
-                'alcumus': alcumus,
-                'notes': notes,
-                'book': book
-            })
-        
-        # Sort by date
-        all_data.sort(key=lambda x: x['date'])
-        
-        # Save all data
-        self.save_data(all_data)
+        record = {
+            'date': date_str,
+            'problems': problems,
+            'exercises': exercises,
+            'alcumus': alcumus,
+            'notes': notes,
+            'book': book
+        }
+        expected_versions = None
+        if expected_version is not None:
+            expected_versions = {date_str: expected_version}
+        self.update_date_records([record], expected_versions)
     
+    @timed()
+    def update_date_records(self, records: List[Dict[str, Any]],
+                            expected_versions: Dict[str, str] = None):
+        """Update or create many records (distinct dates) in one atomic write.
+        
+        expected_versions maps dates to the version the caller last read; if
+        any of them changed, ConflictError is raised and nothing is written.
+        """
+        dates = [record['date'] for record in records]
+        if len(set(dates)) != len(dates):
+            raise ValueError("Batch contains the same date more than once")
+        
+        with self._lock:
+            # Picks up writes made by other processes before we modify
+            self._ensure_index()
+            befores = [self._index.get(date_str) for date_str in dates]
+            for date_str, before in zip(dates, befores):
+                if (expected_versions and date_str in expected_versions
+                        and record_version(before) != expected_versions[date_str]):
+                    raise ConflictError(f"Record for {date_str} was modified by another session")
+            
+            self.backups.ensure_snapshot(self.load_all_data)
+            previous_version = self.get_version()
+            
+            if self.append_only:
+                self._append_records(records)
+            else:
+                # Replace existing records or create new ones; dates stay sorted
+                index = dict(self._index)
+                index.update(zip(dates, records))
+                sorted_dates = self._sorted_dates
+                if any(date_str not in self._index for date_str in dates):
+                    sorted_dates = sorted(index)
+                self._write_file([index[date] for date in sorted_dates])
+            
+            # Backup I/O is one delta line per record, plus a periodic snapshot
+            for date_str, before, record in zip(dates, befores, records):
+                self.backups.log_change(date_str, before, record, self.load_all_data)
+            self._notify(list(zip(dates, befores, records)), previous_version)
+            
+            if self.append_only and self._line_count - len(self._index) > self.compact_threshold:
+                self.compact()
+    
+    @timed()
     def get_latest_problems_and_exercises(self, before_date: str = None) -> tuple:
         """Get the latest problems and exercises before a given date."""
-        all_data = self.load_all_data()
+        self._ensure_index()
         
-        # Filter data before the given date if specified
+        # Find the latest date strictly before the given date
         if before_date:
-            all_data = [record for record in all_data if record['date'] < before_date]
+            pos = bisect.bisect_left(self._sorted_dates, before_date)
+        else:
+            pos = len(self._sorted_dates)
         
-        if not all_data:
+        if pos == 0:
             return [], []
         
-        # Sort by date and get the latest record
-        all_data.sort(key=lambda x: x['date'])
-        latest_record = all_data[-1]
-        
+        latest_record = self._index[self._sorted_dates[pos - 1]]
         return latest_record.get('problems', []), latest_record.get('exercises', [])
+
+
+def create_data_handler(backend: str = None, **kwargs):
+    """Create the storage handler for `backend` ('jsonl' or 'sqlite').
+    
+    Defaults to the CHILD_PROGRESS_BACKEND environment variable, then 'jsonl'.
+    CHILD_PROGRESS_COMPACT=1 turns on compact storage for JSONL files.
+    CHILD_PROGRESS_DURABILITY picks the durability level of either backend
+    (default 'dir', see utils.durability).
+    Keyword arguments are passed to the handler's constructor.
+    """
+    backend = backend or os.environ.get('CHILD_PROGRESS_BACKEND', 'jsonl')
+    kwargs.setdefault('durability', os.environ.get('CHILD_PROGRESS_DURABILITY', DEFAULT_DURABILITY))
+    if backend == 'jsonl':
+        kwargs.setdefault('compact_storage', os.environ.get('CHILD_PROGRESS_COMPACT') == '1')
+        return DataHandler(**kwargs)
+    if backend == 'sqlite':
+        from utils.sqlite_handler import SQLiteDataHandler
+        return SQLiteDataHandler(**kwargs)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+# (date, record before the change or None, record after the change)
+Change = Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+class DerivedStore:
+    """State derived from a handler's records, optionally persisted next to its data.
+
+    The persisted state is stamped with the data version it was computed
+    from. Handlers call `on_change` after every save so subclasses can
+    update the state in place; whenever the stamp does not match the data
+    (first run, external edits, another process saved) the state is rebuilt
+    from the full record list instead.
+
+    Subclasses implement `rebuild` and `apply_changes`. The base class keeps
+    the state in memory only (rebuilt once per process); stores that persist
+    it override `_persist` and `_load_persisted` (see JSONDerivedStore).
+    A rebuild is persisted at once, in-place updates only every
+    `persist_interval` saves and on close(), so a save does not rewrite
+    state proportional to the history.
+    """
+
+    persist_interval = 50
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.version: Optional[str] = None
+        self._lock = threading.RLock()
+        self._unpersisted = 0
+
+    def rebuild(self, records: List[Dict[str, Any]]):
+        """Recompute the state from every record (sorted by date)."""
+        raise NotImplementedError
+
+    def apply_changes(self, changes: List[Change]) -> bool:
+        """Update the state in place; return False to request a full rebuild."""
+        return False
+
+    def _load_persisted(self) -> Optional[str]:
+        """Load the persisted state; returns its version (None if unreadable)."""
+        return None
+
+    def _persist(self):
+        """Write the state stamped with its version."""
+
+    def _save(self):
+        self._persist()
+        self._unpersisted = 0
+
+    def close(self):
+        """Persist in-place updates not written yet."""
+        with self._lock:
+            if self._unpersisted:
+                self._save()
+
+    def _rebuild_from(self, handler):
+        # The version first: a save landing during the load must not be stamped
+        # on state computed without it
+        version = handler.get_version()
+        self.rebuild(handler.load_all_data())
+        self.version = version
+        self._save()
+
+    def refresh(self, handler):
+        """Make sure the state matches the handler's current data."""
+        if self.version == handler.get_version():
+            return
+        # Same lock order as a save (handler, then store: on_change runs under
+        # the handler's lock), so a reader never waits on a writer waiting on it
+        with handler.lock:
+            with self._lock:
+                version = handler.get_version()
+                if self.version == version:
+                    return
+                if self._load_persisted() == version:
+                    return
+                self._rebuild_from(handler)
+
+    def on_change(self, handler, changes: List[Change], previous_version: str):
+        """Called by the handler, under its lock, after a save that moved the data from previous_version."""
+        with self._lock:
+            try:
+                up_to_date = (self.version == previous_version
+                              or self._load_persisted() == previous_version)
+                if up_to_date and self.apply_changes(changes):
+                    self.version = handler.get_version()
+                    self._unpersisted += 1
+                    if self._unpersisted >= self.persist_interval:
+                        self._save()
+                else:
+                    self._rebuild_from(handler)
+            except Exception as e:
+                # Never fail the save; the next refresh() rebuilds from scratch
+                name = os.path.basename(self.path) if self.path else type(self).__name__
+                print(f"Warning: Failed to update {name}: {e}")
+                self.version = None
+                if self.path is not None:
+                    try:
+                        os.remove(self.path)
+                    except OSError:
+                        pass
+
+
+class JSONDerivedStore(DerivedStore):
+    """DerivedStore persisted as one JSON file: {'version': ..., 'state': to_state()}.
+
+    Subclasses also implement `to_state` and `from_state`. With path=None
+    the state is kept in memory only.
+    """
+
+    def to_state(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def from_state(self, state: Dict[str, Any]):
+        raise NotImplementedError
+
+    def _load_persisted(self) -> Optional[str]:
+        if self.path is None:
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                persisted = json.load(f)
+            self.from_state(persisted['state'])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return None
+        self.version = persisted['version']
+        return self.version
+
+    def _persist(self):
+        """Atomically write the state stamped with its version."""
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8',
+                                         dir=directory, delete=False) as f:
+            json.dump({'version': self.version, 'state': self.to_state()}, f, ensure_ascii=False)
+        os.replace(f.name, self.path)
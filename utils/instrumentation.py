@@ -0,0 +1,189 @@
+"""Opt-in timers for the hot paths of a page rerun.
+
+Functions decorated with `timed` and blocks wrapped in `timer` record their
+wall time under a name, with a call count and a histogram per name, both in
+process-wide totals and in the current run (one Streamlit rerun, see
+begin_run/end_run). Timings are inclusive: a timed call made from inside
+another one is counted in both.
+
+Nothing is recorded unless CHILD_PROGRESS_METRICS=1 is set or enable() is
+called; a disabled `timed` function costs one flag check per call.
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is unbounded
+BUCKET_BOUNDS_MS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000, 3000)
+
+METRICS_FILE = os.environ.get('CHILD_PROGRESS_METRICS_FILE', 'data/metrics.jsonl')
+
+_enabled = os.environ.get('CHILD_PROGRESS_METRICS') == '1'
+_lock = threading.Lock()
+_totals: Dict[str, 'Metric'] = {}
+_local = threading.local()
+_NULL_TIMER = nullcontext()
+
+
+class Metric:
+    """Call count, total/max time and histogram of one timed name."""
+
+    __slots__ = ('count', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls (max for the last one)."""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= target:
+                return round(min(bound, self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 3),
+            'buckets': list(self.buckets)
+        }
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def record(name: str, seconds: float):
+    """Add one timing (or, via count(), one event) under `name`."""
+    ms = seconds * 1000
+    with _lock:
+        metric = _totals.get(name)
+        if metric is None:
+            metric = _totals[name] = Metric()
+        metric.add(ms)
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        metric = run.get(name)
+        if metric is None:
+            metric = run[name] = Metric()
+        metric.add(ms)
+
+
+def count(name: str):
+    """Count an event that has no duration."""
+    if _enabled:
+        record(name, 0.0)
+
+
+@contextmanager
+def _timer(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timer(name: str):
+    """Context manager timing its block under `name` (a no-op when disabled)."""
+    return _timer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorator timing every call under `name` (default: the function's qualified name)."""
+    def decorator(func: Callable) -> Callable:
+        metric_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(metric_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def begin_run():
+    """Start collecting the timings of this thread's run (a Streamlit script run)."""
+    _local.run = {}
+    _local.run_start = time.perf_counter()
+
+
+def end_run() -> Optional[Dict[str, Any]]:
+    """Stop collecting; returns {'total_ms', 'metrics'} for the run, or None if none was begun."""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        return None
+    total_ms = (time.perf_counter() - _local.run_start) * 1000
+    _local.run = None
+    return {
+        'total_ms': round(total_ms, 3),
+        'metrics': {name: metric.to_dict() for name, metric in run.items()}
+    }
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Process-wide metrics since start (or the last reset), by name."""
+    with _lock:
+        return {name: metric.to_dict() for name, metric in _totals.items()}
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+
+
+def dump(entry: Dict[str, Any], path: str = None):
+    """Append one JSON line (a run from end_run, or a snapshot) to the metrics file."""
+    path = path or METRICS_FILE
+    line = dict(entry, timestamp=datetime.now().isoformat(timespec='milliseconds'))
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(line, ensure_ascii=False) + '\n')
+    except OSError as e:
+        print(f"Warning: Could not write metrics to {path}: {e}")
+
+
+def format_table(metrics: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Text rows (slowest first) for displaying metrics."""
+    rows = [f"{'name':<40} {'calls':>6} {'total ms':>10} {'p95 ms':>8} {'max ms':>9}"]
+    for name, metric in sorted(metrics.items(), key=lambda item: -item[1]['total_ms']):
+        rows.append(f"{name:<40} {metric['count']:>6} {metric['total_ms']:>10.1f} "
+                    f"{metric['p95_ms']:>8.1f} {metric['max_ms']:>9.1f}")
+    return rows
@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional
+
+from utils.derived import JSONDerivedStore, Change
+
+# Per bucket: [days, problems, exercises, alcumus, total]
+_DAYS, _PROBLEMS, _EXERCISES, _ALCUMUS, _TOTAL = range(5)
+
+
+def week_key(date_str: str) -> str:
+    """Week bucket of a date: the Sunday ending its week (YYYY-MM-DD)."""
+    day = date.fromisoformat(date_str)
+    return (day + timedelta(days=6 - day.weekday())).isoformat()
+
+
+def month_key(date_str: str) -> str:
+    """Month bucket of a date: the first day of its month (YYYY-MM-01)."""
+    return date_str[:8] + '01'
+
+
+def _record_counts(record: Dict[str, Any]) -> List[int]:
+    problems = len(record.get('problems', []))
+    exercises = len(record.get('exercises', []))
+    alcumus = len(record.get('alcumus', []))
+    return [1, problems, exercises, alcumus, problems + exercises + alcumus]
+
+
+class RollupStore(JSONDerivedStore):
+    """Materialized per-week and per-month totals, updated in place on every save.
+
+    A save only adjusts the buckets of the changed date, so weekly/monthly
+    charts cost O(number of buckets) instead of regrouping every day.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.weekly: Dict[str, List[int]] = {}
+        self.monthly: Dict[str, List[int]] = {}
+
+    def _add(self, record: Optional[Dict[str, Any]], sign: int):
+        if not record:
+            return
+        counts = _record_counts(record)
+        for buckets, key in ((self.weekly, week_key(record['date'])),
+                             (self.monthly, month_key(record['date']))):
+            bucket = buckets.setdefault(key, [0] * len(counts))
+            for i, count in enumerate(counts):
+                bucket[i] += sign * count
+            if bucket[_DAYS] == 0:
+                del buckets[key]
+
+    def rebuild(self, records: List[Dict[str, Any]]):
+        self.weekly = {}
+        self.monthly = {}
+        for record in records:
+            self._add(record, 1)
+
+    def apply_changes(self, changes: List[Change]) -> bool:
+        for _, before, after in changes:
+            self._add(before, -1)
+            self._add(after, 1)
+        return True
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'weekly': self.weekly, 'monthly': self.monthly}
+
+    def from_state(self, state: Dict[str, Any]):
+        self.weekly, self.monthly = state['weekly'], state['monthly']
+
+    def _rows(self, buckets: Dict[str, List[int]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    'key': key,
+                    'problems': bucket[_PROBLEMS],
+                    'exercises': bucket[_EXERCISES],
+                    'alcumus': bucket[_ALCUMUS],
+                    'total': bucket[_TOTAL]
+                }
+                for key, bucket in sorted(buckets.items())
+            ]
+
+    def weekly_rows(self) -> List[Dict[str, Any]]:
+        """Weekly totals sorted by week-ending date."""
+        return self._rows(self.weekly)
+
+    def monthly_rows(self) -> List[Dict[str, Any]]:
+        """Monthly totals sorted by month."""
+        return self._rows(self.monthly)
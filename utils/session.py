@@ -0,0 +1,136 @@
+import streamlit as st
+from typing import Any, Dict, List, Tuple
+
+from utils import instrumentation
+from utils.children import ChildRegistry
+from utils.instrumentation import timed
+
+
+@st.cache_resource
+def get_registry() -> ChildRegistry:
+    return ChildRegistry()
+
+
+def _remember_child():
+    st.session_state['child_id'] = st.session_state['_child_select']
+
+
+def get_active_child() -> Tuple[Dict[str, Any], Any]:
+    """Sidebar child selector; returns (child, data handler for its shard).
+
+    The choice is kept in st.session_state so it follows the user across pages.
+    Every page calls this first, so it also starts the rerun's timings (see
+    show_metrics_panel).
+    """
+    if instrumentation.is_enabled():
+        instrumentation.begin_run()
+    registry = get_registry()
+    children = registry.list_children()
+    child_ids = [child['id'] for child in children]
+
+    if st.session_state.get('child_id') not in child_ids:
+        st.session_state['child_id'] = child_ids[0]
+
+    if len(children) > 1:
+        # Widget state is dropped when switching pages, so the selection is
+        # stored under its own key and copied back into the widget each run
+        names = {child['id']: child['name'] for child in children}
+        st.session_state['_child_select'] = st.session_state['child_id']
+        st.sidebar.selectbox(
+            "👧 孩子",
+            child_ids,
+            format_func=lambda child_id: names[child_id],
+            key='_child_select',
+            on_change=_remember_child
+        )
+
+    child_id = st.session_state['child_id']
+    return registry.get_child(child_id), registry.get_handler(child_id)
+
+
+def get_writer(child: Dict[str, Any]):
+    """The process-wide background writer for a child's data (see BackgroundWriter)."""
+    return get_registry().get_writer(child['id'])
+
+
+# Charts are only imported by the pages that draw them
+CHART_KINDS = ('daily', 'weekly', 'monthly')
+FIGURE_CACHE_ENTRIES = 64
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _load_aggregates(child_id: str, version: str, _handler):
+    from utils.aggregation import build_aggregates
+
+    # Day table from the memory-mapped columns, week/month from the rollups;
+    # no record is parsed
+    return build_aggregates(None, rollups=_handler.get_rollups(), columns=_handler.get_columns())
+
+
+@timed('session.load_aggregates')
+def load_aggregates(child: Dict[str, Any], data_handler):
+    """Day/week/month tables for a child's current data (see build_aggregates).
+
+    Shared by every session; treat the returned frames as read-only.
+    """
+    return _load_aggregates(child['id'], data_handler.get_version(), data_handler)
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def _load_figure(child_id: str, version: str, kind: str, date_range, _handler):
+    from utils import charts
+
+    aggregates = _load_aggregates(child_id, version, _handler)
+    if kind == 'daily':
+        return charts.create_daily_chart(None, aggregates, date_range=date_range)
+    if kind == 'weekly':
+        return charts.create_weekly_chart(None, aggregates)
+    return charts.create_monthly_chart(None, aggregates)
+
+
+@timed('session.get_chart')
+def get_chart(child: Dict[str, Any], data_handler, kind: str, date_range=None):
+    """Overview figure ('daily', 'weekly' or 'monthly'), cached across sessions.
+
+    Keyed by (child, data version, kind, date range) with LRU eviction after
+    FIGURE_CACHE_ENTRIES figures; the figure is shared and must not be mutated.
+    """
+    if kind not in CHART_KINDS:
+        raise ValueError(f"Unknown chart kind: {kind}")
+    return _load_figure(child['id'], data_handler.get_version(), kind, date_range, data_handler)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _load_achievements(child_id: str, version: str, _handler) -> List[Dict[str, Any]]:
+    return _handler.get_achievements()
+
+
+@timed('session.get_achievements')
+def get_achievements(child: Dict[str, Any], data_handler) -> List[Dict[str, Any]]:
+    """Achievements for a child's current data, cached by data version."""
+    return _load_achievements(child['id'], data_handler.get_version(), data_handler)
+
+
+def show_metrics_panel(page: str):
+    """Sidebar timings of this rerun and since the server started.
+
+    Only shown with CHILD_PROGRESS_METRICS=1; each rerun is also appended to
+    the metrics file (CHILD_PROGRESS_METRICS_FILE, default data/metrics.jsonl).
+    """
+    if not instrumentation.is_enabled():
+        return
+    run = instrumentation.end_run()
+    if run is None:
+        return
+    instrumentation.dump({'page': page, **run})
+
+    with st.sidebar.expander("⏱️ 性能指标"):
+        st.caption(f"本次运行 {run['total_ms']:.0f} ms（嵌套调用的时间会重复计入）")
+        st.code('\n'.join(instrumentation.format_table(run['metrics'])), language=None)
+        st.caption("启动以来累计")
+        st.code('\n'.join(instrumentation.format_table(instrumentation.snapshot())), language=None)
+        if st.button("写入累计指标", key='_metrics_dump'):
+            instrumentation.dump({'page': page, 'totals': instrumentation.snapshot()})
+            st.success(f"已写入 {instrumentation.METRICS_FILE}")
+        if st.button("清空累计指标", key='_metrics_reset'):
+            instrumentation.reset()
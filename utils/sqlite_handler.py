@@ -0,0 +1,464 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Optional, Tuple, TYPE_CHECKING
+
+from utils.backup import BackupStore
+from utils.compact import expand_record
+from utils.data_handler import ConflictError, record_version
+from utils.durability import check_durability
+from utils.instrumentation import timed
+from utils.achievements import AchievementEngine
+from utils.audit import ContinuityAudit
+from utils.rollups import RollupStore
+from utils.validation import parse_problem_number
+
+if TYPE_CHECKING:
+    from utils.columnar import DayColumns
+
+ITEM_KINDS = ('problems', 'exercises', 'alcumus')
+
+# PRAGMA synchronous per durability level. In WAL mode FULL syncs the WAL on
+# every commit, EXTRA also syncs the directory, and NORMAL only syncs at
+# checkpoints - SQLite's own form of group commit.
+SYNCHRONOUS = {'none': 'OFF', 'file': 'FULL', 'dir': 'EXTRA', 'group': 'NORMAL'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    date TEXT PRIMARY KEY,
+    notes TEXT NOT NULL DEFAULT '',
+    book TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS items (
+    date TEXT NOT NULL REFERENCES records(date) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    chapter INTEGER,
+    PRIMARY KEY (date, kind, position)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_items_chapter ON items(chapter, date);
+CREATE INDEX IF NOT EXISTS idx_items_value ON items(kind, value);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', '0');
+"""
+
+
+class SQLiteDataHandler:
+    """SQLite storage backend with the same interface as DataHandler.
+
+    One row per date in `records`; the solved items live in `items`, keyed by
+    (date, kind, position) so point reads and date-range scans use the
+    primary key instead of the whole history.
+    """
+
+    def __init__(self, db_file='data/progress.db', backup_dir=None, max_backups=10,
+                 snapshot_interval=50, durability='none'):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+        self.durability = check_durability(durability)
+
+        # Optional snapshot + delta backups, same layout as the JSONL handler
+        self.backups = None
+        if backup_dir:
+            self.backups = BackupStore(backup_dir, max_snapshots=max_backups,
+                                       snapshot_interval=snapshot_interval,
+                                       durability=durability)
+
+        # Streamlit reruns scripts on different threads; share one
+        # connection and serialize access to it. Transactions are managed
+        # explicitly (BEGIN IMMEDIATE) so read-check-write is atomic across
+        # processes.
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._conn.executescript(SCHEMA)
+
+        # Derived data kept in sync on every write (see utils.derived)
+        self.derived_stores = []
+        base = os.path.splitext(db_file)[0]
+        self.rollups = RollupStore(base + '.rollups.json')
+        self.add_derived_store(self.rollups)
+        self.achievements = AchievementEngine(base + '.achievements.json')
+        self.add_derived_store(self.achievements)
+        # Created by the first get_columns(), so pages that never read the
+        # columns do not import numpy
+        self.day_columns = None
+        self.audit = ContinuityAudit()
+        self.add_derived_store(self.audit)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The shared connection, (re)opened on first use after close()."""
+        with self._lock:
+            if self._connection is None:
+                conn = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level=None)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(f'PRAGMA synchronous={SYNCHRONOUS[self.durability]}')
+                conn.execute('PRAGMA foreign_keys=ON')
+                self._connection = conn
+            return self._connection
+
+    @property
+    def lock(self):
+        """The re-entrant lock saves hold; derived stores take it before their own."""
+        return self._lock
+
+    def add_derived_store(self, store):
+        """Register a DerivedStore to be updated after every write."""
+        self.derived_stores.append(store)
+
+    def recover(self) -> Optional[str]:
+        """Startup check, for parity with DataHandler.recover.
+
+        SQLite rolls back or replays its own WAL when the database is opened,
+        so there is nothing to restore here; returns None.
+        """
+        return None
+
+    def _notify(self, changes, previous_version: str):
+        """Update derived stores; changes=None means they must rebuild."""
+        for store in self.derived_stores:
+            if changes is None:
+                store.refresh(self)
+            else:
+                store.on_change(self, changes, previous_version)
+
+    def get_rollups(self) -> RollupStore:
+        """Weekly/monthly totals, up to date with the current data."""
+        self.rollups.refresh(self)
+        return self.rollups
+
+    @timed()
+    def get_achievements(self) -> List[Dict[str, Any]]:
+        """Chapter completions and milestones, newest first."""
+        self.achievements.refresh(self)
+        return self.achievements.achievements()
+
+    def get_columns(self) -> 'DayColumns':
+        """Per-day dates, counts and item runs (memory-mapped), up to date with the current data."""
+        with self._lock:
+            if self.day_columns is None:
+                from utils.columnar import ColumnarSnapshot
+
+                self.day_columns = ColumnarSnapshot(os.path.splitext(self.db_file)[0] + '.columns')
+                self.add_derived_store(self.day_columns)
+        self.day_columns.refresh(self)
+        return self.day_columns.columns
+
+    @timed()
+    def get_continuity_issues(self, date_str: str = None) -> List[Dict[str, Any]]:
+        """Gaps, overlaps and duplicates in the whole history (or involving date_str)."""
+        self.audit.refresh(self)
+        return self.audit.issues(date_str)
+
+    def close(self):
+        """Close the underlying database connection (and persist derived stores, commit pending backup fsyncs).
+
+        The handler stays usable: the next access reopens the connection.
+        """
+        with self._lock:
+            for store in self.derived_stores:
+                store.close()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+            if self.backups is not None:
+                self.backups.close()
+
+    def _build_records(self, rows, item_rows) -> List[Dict[str, Any]]:
+        """Assemble record dicts from `records` rows and ordered `items` rows."""
+        records = {}
+        for date, notes, book in rows:
+            records[date] = {
+                'date': date,
+                'problems': [],
+                'exercises': [],
+                'alcumus': [],
+                'notes': notes,
+                'book': book
+            }
+        for date, kind, value in item_rows:
+            records[date][kind].append(value)
+        return list(records.values())
+
+    def _query_records(self, where: str = '', params: tuple = ()) -> List[Dict[str, Any]]:
+        """Load records (with their items) matching a WHERE clause on date."""
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT date, notes, book FROM records {where} ORDER BY date', params
+            ).fetchall()
+            item_rows = self._conn.execute(
+                f'SELECT date, kind, value FROM items {where} ORDER BY date, kind, position', params
+            ).fetchall()
+        return self._build_records(rows, item_rows)
+
+    @timed()
+    def load_all_data(self) -> List[Dict[str, Any]]:
+        """Load all progress data, sorted by date."""
+        return self._query_records()
+
+    def get_data_by_date(self, date_str: str) -> Dict[str, Any]:
+        """Get progress data for a specific date."""
+        records = self._query_records('WHERE date = ?', (date_str,))
+        return records[0] if records else {}
+
+    def _write_record(self, conn: sqlite3.Connection, record: Dict[str, Any]):
+        """Upsert one record and replace its items (caller owns the transaction)."""
+        date_str = record['date']
+        conn.execute(
+            'INSERT INTO records (date, notes, book) VALUES (?, ?, ?) '
+            'ON CONFLICT(date) DO UPDATE SET notes = excluded.notes, book = excluded.book',
+            (date_str, record.get('notes', ''), record.get('book', ''))
+        )
+        conn.execute('DELETE FROM items WHERE date = ?', (date_str,))
+
+        item_rows = []
+        for kind in ITEM_KINDS:
+            for position, value in enumerate(record.get(kind, [])):
+                parsed = parse_problem_number(value) if kind != 'alcumus' else None
+                chapter = parsed.chapter if parsed else None
+                item_rows.append((date_str, kind, position, value, chapter))
+        conn.executemany(
+            'INSERT INTO items (date, kind, position, value, chapter) VALUES (?, ?, ?, ?, ?)',
+            item_rows
+        )
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the write lock for the whole read-modify-write.
+
+        Yields the data version before the transaction. A fresh random version
+        is set inside it, so a rolled-back transaction never reuses a version.
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                previous_version = self.get_version()
+                self._conn.execute("UPDATE meta SET value = ? WHERE key = 'version'",
+                                   (uuid.uuid4().hex,))
+                yield previous_version
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def get_version(self) -> str:
+        """Opaque data version; changed by every committed write."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return str(row[0])
+
+    @timed()
+    def write_records(self, records: List[Dict[str, Any]],
+                      expected_versions: Dict[str, str] = None):
+        """Upsert many records in a single transaction.
+
+        expected_versions maps dates to the version the caller last read;
+        if any of them changed, ConflictError is raised and nothing is written.
+        """
+        with self._transaction() as previous_version:
+            befores = []
+            for record in records:
+                date_str = record['date']
+                before = self.get_data_by_date(date_str)
+                if (expected_versions and date_str in expected_versions
+                        and record_version(before) != expected_versions[date_str]):
+                    raise ConflictError(f"Record for {date_str} was modified by another session")
+                befores.append(before)
+
+            if self.backups is not None:
+                self.backups.ensure_snapshot(self.load_all_data)
+            for record in records:
+                self._write_record(self._conn, record)
+            self._notify([(record['date'], before or None, record)
+                          for before, record in zip(befores, records)], previous_version)
+
+        if self.backups is not None:
+            for before, record in zip(befores, records):
+                self.backups.log_change(record['date'], before, record, self.load_all_data)
+
+    def update_date_records(self, records: List[Dict[str, Any]],
+                            expected_versions: Dict[str, str] = None):
+        """Update or create many records (distinct dates) in one transaction."""
+        dates = [record['date'] for record in records]
+        if len(set(dates)) != len(dates):
+            raise ValueError("Batch contains the same date more than once")
+        self.write_records(records, expected_versions)
+
+    @timed()
+    def import_records(self, records: Iterable[Dict[str, Any]]):
+        """Stream many records into the database in one transaction.
+
+        Unlike write_records, records are not held in memory and no
+        per-record deltas are logged; derived stores are rebuilt afterwards.
+        """
+        if self.backups is not None:
+            self.backups.ensure_snapshot(self.load_all_data)
+        with self._transaction() as previous_version:
+            for record in records:
+                self._write_record(self._conn, record)
+            self._notify(None, previous_version)
+        if self.backups is not None:
+            self.backups.snapshot(self.load_all_data())
+
+    def get_alcumus_dates(self, timestamps: Iterable[str]) -> Dict[str, str]:
+        """Map each already stored timestamp among `timestamps` to its date."""
+        timestamps = list(timestamps)
+        alcumus_dates = {}
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(timestamps), 500):
+            batch = timestamps[start:start + 500]
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT value, MIN(date) FROM items WHERE kind = 'alcumus' AND value IN ({}) "
+                    "GROUP BY value".format(', '.join('?' * len(batch))),
+                    batch
+                ).fetchall()
+            alcumus_dates.update(rows)
+        return alcumus_dates
+
+    def get_chapters(self) -> List[int]:
+        """Chapters that appear in any Problem or Exercise, ascending."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT chapter FROM items WHERE chapter IS NOT NULL ORDER BY chapter'
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_date_range(self) -> Tuple[Optional[str], Optional[str]]:
+        """First and last recorded date (None, None if there is no data)."""
+        with self._lock:
+            return self._conn.execute('SELECT MIN(date), MAX(date) FROM records').fetchone()
+
+    @timed()
+    def query_records(self, start_date: str = None, end_date: str = None,
+                      chapter: int = None, offset: int = 0, limit: int = None,
+                      newest_first: bool = True) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of records filtered by date range (inclusive) and chapter.
+
+        Filters run on the date primary key and the chapter index; only the
+        page's items are loaded.
+
+        Returns:
+            (records of the page, total number of matching records)
+        """
+        conditions, params = [], []
+        if start_date:
+            conditions.append('date >= ?')
+            params.append(start_date)
+        if end_date:
+            conditions.append('date <= ?')
+            params.append(end_date)
+        if chapter is not None:
+            conditions.append('date IN (SELECT date FROM items WHERE chapter = ?)')
+            params.append(chapter)
+        where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+        order = 'DESC' if newest_first else 'ASC'
+
+        with self._lock:
+            total = self._conn.execute(f'SELECT COUNT(*) FROM records {where}', params).fetchone()[0]
+            dates = [row[0] for row in self._conn.execute(
+                f'SELECT date FROM records {where} ORDER BY date {order} LIMIT ? OFFSET ?',
+                params + [-1 if limit is None else limit, offset]
+            )]
+            if not dates:
+                return [], total
+            # The page is a contiguous slice of the filtered dates
+            page_where = ' AND '.join(conditions + ['date BETWEEN ? AND ?'])
+            records = self._query_records(f'WHERE {page_where}',
+                                          tuple(params + [min(dates), max(dates)]))
+        if newest_first:
+            records.reverse()
+        return records, total
+
+    def get_record_version(self, date_str: str) -> str:
+        """Version (etag) of a date's record, for passing back to update_date_record."""
+        return record_version(self.get_data_by_date(date_str))
+
+    def update_date_record(self, date_str: str, problems: List[str],
+                          exercises: List[str], notes: str,
+                          alcumus: List[str] = None,
+                          book: str = "Introduction to Algebra",
+                          expected_version: str = None):
+        """Update or create a record for a specific date.
+
+        Raises ConflictError if expected_version no longer matches.
+        """
+        if alcumus is None:
+            alcumus = []
+        expected_versions = None
+        if expected_version is not None:
+            expected_versions = {date_str: expected_version}
+        self.write_records([{
+            'date': date_str,
+            'problems': problems,
+            'exercises': exercises,
+            'alcumus': alcumus,
+            'notes': notes,
+            'book': book
+        }], expected_versions)
+
+    @timed()
+    def get_latest_problems_and_exercises(self, before_date: str = None) -> tuple:
+        """Get the latest problems and exercises before a given date."""
+        with self._lock:
+            if before_date:
+                row = self._conn.execute(
+                    'SELECT date FROM records WHERE date < ? ORDER BY date DESC LIMIT 1',
+                    (before_date,)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    'SELECT date FROM records ORDER BY date DESC LIMIT 1'
+                ).fetchone()
+
+        if row is None:
+            return [], []
+
+        latest_record = self.get_data_by_date(row[0])
+        return latest_record.get('problems', []), latest_record.get('exercises', [])
+
+
+def migrate_jsonl_to_sqlite(jsonl_file: str, db_file: str) -> int:
+    """Copy every record of a progress.jsonl file into a SQLite database.
+
+    Later lines for the same date overwrite earlier ones, matching the
+    JSONL handler. Returns the number of lines imported.
+    """
+    handler = SQLiteDataHandler(db_file)
+    count = 0
+
+    def read_records():
+        nonlocal count
+        with open(jsonl_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    count += 1
+                    yield expand_record(json.loads(line))
+
+    try:
+        handler.import_records(read_records())
+    finally:
+        handler.close()
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migrate progress.jsonl into a SQLite database.')
+    parser.add_argument('--jsonl', default='data/progress.jsonl')
+    parser.add_argument('--db', default='data/progress.db')
+    args = parser.parse_args()
+
+    imported = migrate_jsonl_to_sqlite(args.jsonl, args.db)
+    print(f"Imported {imported} records from {args.jsonl} into {args.db}")
@@ -1,6 +1,17 @@
 import re
-from typing import List, Tuple, Optional
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Optional, NamedTuple, Iterable, Iterator
 
+from utils.instrumentation import timed
+
+
+# Alcumus timestamps like "2025-09-01 12:45:52" (always 19 characters)
+_TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
+_TIMESTAMP_LENGTH = 19
+
+
+@timed()
 def extract_alcumus_timestamps(text: str) -> List[str]:
     """
     Extract Alcumus problem timestamps from pasted text.
@@ -11,13 +22,107 @@ def extract_alcumus_timestamps(text: str) -> List[str]:
     Returns:
         List of timestamps found (format: YYYY-MM-DD HH:MM:SS)
     """
-    # Pattern to match timestamps like "2025-09-01 12:45:52"
-    timestamp_pattern = r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}'
-    timestamps = re.findall(timestamp_pattern, text)
-    return timestamps
+    return _TIMESTAMP_PATTERN.findall(text)
+
+
+def iter_text_chunks(text: str, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Split a large string into chunks for iter_alcumus_timestamps."""
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+
+def iter_alcumus_timestamps(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming extract_alcumus_timestamps over chunks of text (e.g. a file).
+    
+    Yields the same timestamps as extract_alcumus_timestamps on the joined
+    text, including timestamps split across chunk boundaries, while only
+    holding one chunk in memory.
+    """
+    tail = ''
+    for chunk in chunks:
+        buffer = tail + chunk
+        end = 0
+        for match in _TIMESTAMP_PATTERN.finditer(buffer):
+            yield match.group()
+            end = match.end()
+        # Keep just enough to complete a timestamp started at the end
+        tail = buffer[max(end, len(buffer) - (_TIMESTAMP_LENGTH - 1)):]
+
+
+def unique_timestamps(timestamps: Iterable[str]) -> Iterator[str]:
+    """Drop repeated timestamps, keeping the first occurrence order."""
+    seen = set()
+    for timestamp in timestamps:
+        if timestamp not in seen:
+            seen.add(timestamp)
+            yield timestamp
+
 
+# Problem "X.Y" or Exercise "X.Y.Z"
+_PROBLEM_NUMBER = re.compile(r'^(\d+)\.(\d+)(?:\.(\d+))?$')
 
-def parse_problem_number(problem_str: str) -> Optional[Tuple[int, int, Optional[int]]]:
+
+class ProblemId(NamedTuple):
+    """Parsed AOPS problem number; exercise is None for Problems.
+    
+    A tuple (no per-instance dict), so it unpacks like the old
+    (chapter, section, exercise_num) result. Ordering puts a section's
+    Problem before its Exercises.
+    """
+    chapter: int
+    section: int
+    exercise: Optional[int] = None
+    
+    @property
+    def is_problem(self) -> bool:
+        return self.exercise is None
+    
+    @property
+    def sort_key(self) -> Tuple[int, int, int]:
+        return (self.chapter, self.section, -1 if self.exercise is None else self.exercise)
+    
+    def __lt__(self, other):
+        return self.sort_key < other.sort_key
+    
+    def __le__(self, other):
+        return self.sort_key <= other.sort_key
+    
+    def __gt__(self, other):
+        return self.sort_key > other.sort_key
+    
+    def __ge__(self, other):
+        return self.sort_key >= other.sort_key
+    
+    def __str__(self) -> str:
+        if self.exercise is None:
+            return f"{self.chapter}.{self.section}"
+        return f"{self.chapter}.{self.section}.{self.exercise}"
+    
+    def is_successor_of(self, previous: 'ProblemId') -> bool:
+        """Whether this item directly follows `previous` (same kind only)."""
+        if self.is_problem != previous.is_problem:
+            return False
+        
+        if self.is_problem:
+            if self.chapter == previous.chapter:
+                return self.section == previous.section + 1
+            # Cross-chapter: assume chapter transition is valid
+            return self.chapter == previous.chapter + 1 and self.section == 1
+        
+        if self.chapter == previous.chapter and self.section == previous.section:
+            return self.exercise == previous.exercise + 1
+        elif self.chapter == previous.chapter and self.section == previous.section + 1:
+            # Cross-section within same chapter
+            return self.exercise == 1
+        elif self.chapter == previous.chapter + 1:
+            # Cross-chapter
+            return self.section == 1 and self.exercise == 1
+        return False
+
+
+@lru_cache(maxsize=8192)
+def parse_problem_number(problem_str: str) -> Optional[ProblemId]:
     """
     Parse AOPS problem number into components.
     
@@ -25,29 +130,17 @@ def parse_problem_number(problem_str: str) -> Optional[Tuple[int, int, Optional[
         problem_str: String like "15.1" (Problem) or "15.1.5" (Exercise)
     
     Returns:
-        Tuple of (chapter, section, exercise_num) or None if invalid
-        exercise_num is None for Problems
-    """
-    problem_str = problem_str.strip()
+        ProblemId (chapter, section, exercise) or None if invalid
+        exercise is None for Problems
     
-    # Problem format: X.Y (exactly one dot)
-    problem_pattern = r'^(\d+)\.(\d+)$'
-    problem_match = re.match(problem_pattern, problem_str)
-    if problem_match:
-        chapter = int(problem_match.group(1))
-        section = int(problem_match.group(2))
-        return (chapter, section, None)
-    
-    # Exercise format: X.Y.Z (exactly two dots)
-    exercise_pattern = r'^(\d+)\.(\d+)\.(\d+)$'
-    exercise_match = re.match(exercise_pattern, problem_str)
-    if exercise_match:
-        chapter = int(exercise_match.group(1))
-        section = int(exercise_match.group(2))
-        exercise = int(exercise_match.group(3))
-        return (chapter, section, exercise)
-    
-    return None
+    Results are cached, so repeated strings share one ProblemId and are
+    only tokenized once.
+    """
+    match = _PROBLEM_NUMBER.match(problem_str.strip())
+    if not match:
+        return None
+    chapter, section, exercise = match.groups()
+    return ProblemId(int(chapter), int(section), None if exercise is None else int(exercise))
 
 
 def validate_problem_format(problems_str: str) -> Tuple[bool, str, List[str], List[str]]:
@@ -90,32 +183,7 @@ def is_consecutive_problems(prob1: str, prob2: str) -> bool:
     if not parsed1 or not parsed2:
         return False
     
-    ch1, sec1, ex1 = parsed1
-    ch2, sec2, ex2 = parsed2
-    
-    # Both must be same type (Problem or Exercise)
-    if (ex1 is None) != (ex2 is None):
-        return False
-    
-    if ex1 is None and ex2 is None:
-        # Both are Problems
-        if ch1 == ch2:
-            return sec2 == sec1 + 1
-        else:
-            # Cross-chapter: assume chapter transition is valid
-            return ch2 == ch1 + 1 and sec2 == 1
-    else:
-        # Both are Exercises
-        if ch1 == ch2 and sec1 == sec2:
-            return ex2 == ex1 + 1
-        elif ch1 == ch2 and sec2 == sec1 + 1:
-            # Cross-section within same chapter
-            return ex2 == 1
-        elif ch2 == ch1 + 1:
-            # Cross-chapter
-            return sec2 == 1 and ex2 == 1
-        else:
-            return False
+    return parsed2.is_successor_of(parsed1)
 
 
 def validate_daily_continuity(items: List[str]) -> Tuple[bool, str]:
@@ -145,6 +213,7 @@ def validate_cross_day_continuity(today_items: List[str],
     return True, ""
 
 
+@timed()
 def validate_continuity(today_problems: List[str], today_exercises: List[str],
                        previous_problems: List[str], previous_exercises: List[str]) -> Tuple[bool, str]:
     """
@@ -178,3 +247,99 @@ def validate_continuity(today_problems: List[str], today_exercises: List[str],
             return False, f"Exercise {error}"
     
     return True, ""
+
+
+def _daily_continuity_errors(items: List[str]) -> List[str]:
+    """Every break within one day's items (validate_daily_continuity stops at the first)."""
+    return [f"题目不连续: {items[i]} 到 {items[i + 1]}"
+            for i in range(len(items) - 1)
+            if not is_consecutive_problems(items[i], items[i + 1])]
+
+
+@timed()
+def validate_batch(days: List[Dict[str, Any]],
+                   stored: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """
+    Continuity validation for many days at once, in one pass.
+    
+    Args:
+        days: Records ({'date', 'problems', 'exercises'}) sorted by date
+        stored: Saved records sorted by date: at least those between the
+            first and last day, plus the latest one before the first day and
+            the earliest one after the last day
+    
+    The batch is laid over the saved records (a day replaces the saved
+    record of its date). Each day is then checked against the day before
+    it, batch or saved, exactly as validate_continuity checks a single day
+    against the latest saved record; a saved day that follows a batch day
+    is checked against it too, as the batch must not break it.
+    
+    Returns:
+        Every error as (date, error_message); empty if the batch is valid
+    """
+    errors = []
+    previous_date = None
+    for day in days:
+        date_str = day['date']
+        if previous_date is not None and date_str <= previous_date:
+            errors.append((date_str, f"日期顺序错误: {date_str} 应晚于 {previous_date}"))
+        previous_date = date_str
+    
+    timeline = {record['date']: (record, False) for record in stored}
+    timeline.update((day['date'], (day, True)) for day in days)
+    previous, previous_in_batch = None, False
+    for date_str in sorted(timeline):
+        day, in_batch = timeline[date_str]
+        kinds = (('Problem', day.get('problems', []), (previous or {}).get('problems', [])),
+                 ('Exercise', day.get('exercises', []), (previous or {}).get('exercises', [])))
+        if in_batch:
+            for kind, items, _ in kinds:
+                for error in _daily_continuity_errors(items):
+                    errors.append((date_str, f"{kind}连续性错误: {error}"))
+        if in_batch or previous_in_batch:
+            for kind, items, previous_items in kinds:
+                if items and previous_items:
+                    valid, error = validate_cross_day_continuity(items, previous_items)
+                    if not valid:
+                        prefix = kind if in_batch else f"已保存记录的{kind}"
+                        errors.append((date_str, f"{prefix} {error}"))
+        previous, previous_in_batch = day, in_batch
+    
+    return errors
+
+
+def _is_date(date_str: str) -> bool:
+    try:
+        datetime.strptime(date_str, '%Y-%m-%d')
+    except ValueError:
+        return False
+    return True
+
+
+def parse_batch_input(text: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Parse back-fill lines of the form "YYYY-MM-DD: 15.1, 15.2, 15.1.1".
+    
+    Returns:
+        (days sorted by date, format error messages)
+    """
+    days = {}
+    errors = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        date_str, sep, items = line.partition(':')
+        date_str = date_str.strip()
+        if not sep or not _is_date(date_str):
+            errors.append(f"第{line_number}行格式错误: 请使用 YYYY-MM-DD: 题目列表")
+            continue
+        if date_str in days:
+            errors.append(f"第{line_number}行日期重复: {date_str}")
+            continue
+        is_valid, error_msg, problems, exercises = validate_problem_format(items)
+        if not is_valid:
+            errors.append(f"第{line_number}行{error_msg}")
+            continue
+        days[date_str] = {'date': date_str, 'problems': problems, 'exercises': exercises}
+    return [days[date_str] for date_str in sorted(days)], errors
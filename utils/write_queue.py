@@ -0,0 +1,206 @@
+import atexit
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.data_handler import ConflictError, record_version
+from utils.instrumentation import count
+
+
+class _PendingSave:
+    __slots__ = ('record', 'expected_version', 'futures')
+
+    def __init__(self, record: Dict[str, Any], expected_version: Optional[str]):
+        self.record = record
+        self.expected_version = expected_version
+        self.futures: List[Future] = []
+
+
+class BackgroundWriter:
+    """Single writer thread that applies a handler's saves off the script thread.
+
+    `submit` queues a record and returns a Future at once. Saves for a date
+    that is still waiting are coalesced: the newest record replaces the
+    queued one, keeping the expected version of the first (the intermediate
+    record never reached the disk), and every submitter's Future gets the
+    outcome. A save made against an older version than the queued record
+    (another session's edit of the same day) is not merged; its Future
+    fails with ConflictError, as update_date_record would. The worker writes
+    everything waiting in one
+    update_date_records call (backups included); if that conflicts, the
+    dates are retried one by one so only the conflicting save fails.
+
+    At most `max_pending` dates wait at a time; `submit` blocks beyond that.
+    A `submit` after `close` starts the worker again, so a writer closed
+    while another session still holds it keeps working.
+    Until a save is written, `get_data_by_date`, `get_record_version` and
+    `get_latest_problems_and_exercises` return the queued record, so the
+    session that saved reads its own write.
+    """
+
+    def __init__(self, handler, max_pending: int = 64):
+        self.handler = handler
+        self.max_pending = max_pending
+
+        self._pending: 'OrderedDict[str, _PendingSave]' = OrderedDict()  # date -> save, oldest first
+        self._writing: Dict[str, Dict[str, Any]] = {}  # date -> record being written
+        self._condition = threading.Condition()
+        self._closed = False
+        self._running = False
+        self._thread = None
+        self._start()
+
+    def _start(self):
+        """Start the worker (called with the condition held, or from __init__)."""
+        self._closed = False
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='background-writer', daemon=True)
+            self._thread.start()
+        # Pending saves are written before the interpreter exits
+        atexit.unregister(self.close)
+        atexit.register(self.close)
+
+    def submit(self, record: Dict[str, Any], expected_version: str = None) -> Future:
+        """Queue a record (same fields as update_date_record) and return its Future.
+
+        The Future's result is None once the record is written; it raises
+        ConflictError (or the write's error) if the save failed.
+        """
+        future = Future()
+        date_str = record['date']
+        with self._condition:
+            if self._closed:
+                self._start()
+            while date_str not in self._pending and len(self._pending) >= self.max_pending:
+                self._condition.wait()
+            pending = self._pending.get(date_str)
+            if pending is None:
+                pending = self._pending[date_str] = _PendingSave(record, expected_version)
+            elif expected_version is not None and expected_version != record_version(pending.record):
+                future.set_exception(ConflictError(
+                    f"Record for {date_str} was modified by another session"))
+                return future
+            else:
+                count('BackgroundWriter.coalesced')
+                pending.record = record
+            pending.futures.append(future)
+            self._condition.notify_all()
+        return future
+
+    def _queued(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """The newest record for a date that is waiting or being written."""
+        with self._condition:
+            pending = self._pending.get(date_str)
+            if pending is not None:
+                return pending.record
+            return self._writing.get(date_str)
+
+    def _queued_dates(self) -> List[str]:
+        with self._condition:
+            return list(self._pending) + list(self._writing)
+
+    def get_data_by_date(self, date_str: str) -> Dict[str, Any]:
+        record = self._queued(date_str)
+        return record if record is not None else self.handler.get_data_by_date(date_str)
+
+    def get_record_version(self, date_str: str) -> str:
+        record = self._queued(date_str)
+        return record_version(record) if record is not None else self.handler.get_record_version(date_str)
+
+    def get_latest_problems_and_exercises(self, before_date: str = None) -> tuple:
+        """Like the handler's, with queued saves taking part."""
+        queued = [d for d in self._queued_dates() if before_date is None or d < before_date]
+        if not queued:
+            return self.handler.get_latest_problems_and_exercises(before_date)
+
+        latest_queued = max(queued)
+        # A stored record later than every queued one still wins
+        end_date = (date.fromisoformat(before_date) - timedelta(days=1)).isoformat() if before_date else None
+        stored, _ = self.handler.query_records(start_date=latest_queued, end_date=end_date, limit=1)
+        if stored and stored[0]['date'] > latest_queued:
+            latest = stored[0]
+        else:
+            latest = self._queued(latest_queued) or self.handler.get_data_by_date(latest_queued)
+        return latest.get('problems', []), latest.get('exercises', [])
+
+    def _take_batch(self) -> Optional[List[Tuple[str, _PendingSave]]]:
+        """Wait for pending saves and move all of them to 'being written' (None once closed and drained)."""
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if not self._pending:
+                self._running = False
+                self._condition.notify_all()
+                return None
+            batch = list(self._pending.items())
+            self._pending.clear()
+            self._writing = {date_str: pending.record for date_str, pending in batch}
+            self._condition.notify_all()
+            return batch
+
+    def _write(self, batch: List[Tuple[str, _PendingSave]]):
+        records = [pending.record for _, pending in batch]
+        expected = {date_str: pending.expected_version for date_str, pending in batch
+                    if pending.expected_version is not None}
+        try:
+            self.handler.update_date_records(records, expected)
+            outcomes = [None] * len(batch)
+        except ConflictError:
+            if len(batch) == 1:
+                raise
+            # Retry one by one so only the conflicting dates fail
+            outcomes = []
+            for date_str, pending in batch:
+                try:
+                    self.handler.update_date_records(
+                        [pending.record],
+                        {date_str: pending.expected_version} if date_str in expected else None
+                    )
+                    outcomes.append(None)
+                except Exception as e:
+                    outcomes.append(e)
+
+        for (_, pending), outcome in zip(batch, outcomes):
+            for future in pending.futures:
+                if outcome is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(outcome)
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                self._write(batch)
+            except Exception as e:
+                if not isinstance(e, ConflictError):
+                    print(f"Warning: Background save failed: {e}")
+                for _, pending in batch:
+                    for future in pending.futures:
+                        if not future.done():
+                            future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._writing = {}
+                    self._condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every queued save is written; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def close(self):
+        """Write what is queued, then stop the worker."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            if threading.current_thread() is not self._thread:
+                # Until the worker stops, or a submit meanwhile started it again
+                self._condition.wait_for(lambda: not self._running or not self._closed)
+            if self._closed:
+                atexit.unregister(self.close)